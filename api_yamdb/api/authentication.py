@@ -0,0 +1,33 @@
+"""JWT-аутентификация с кэшированием пользователя.
+
+Стандартный JWTAuthentication загружает пользователя из базы на каждый
+запрос. Здесь пользователь берется из кэша ответов API с коротким сроком
+жизни, а запись сбрасывается сигналами при изменении или удалении
+пользователя (см. api.signals).
+"""
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from api.cache import response_cache
+
+
+def user_cache_tag(user_id):
+    return f'user:{user_id}'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        key = response_cache.make_key('auth-user', user_id)
+        user = response_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            response_cache.set(
+                key, user, {user_cache_tag(user_id)},
+                timeout=getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60),
+            )
+        return user
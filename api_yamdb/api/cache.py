@@ -0,0 +1,102 @@
+"""Кэш ответов API с инвалидацией по тегам.
+
+Каждый тег хранит в кэше случайную версию. Запись кэша запоминает
+версии своих тегов на момент сохранения и считается устаревшей, если
+версия хотя бы одного тега изменилась. Инвалидация тега — это замена
+его версии, поэтому она не требует перебора ключей и одинаково работает
+с локальным и файловым бэкендами Django.
+"""
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+GLOBAL_TAG = '*'
+
+
+class TaggedCache:
+    key_prefix = 'api-response'
+
+    def __init__(self, alias=None, timeout=None):
+        self.alias = alias or getattr(settings, 'API_CACHE_ALIAS', 'default')
+        self.timeout = timeout or getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, *parts):
+        digest = hashlib.md5(
+            '\n'.join(str(part) for part in parts).encode()
+        ).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def tag_key(self, tag):
+        return f'{self.key_prefix}:tag:{tag}'
+
+    def get_tag_versions(self, tags):
+        keys = {self.tag_key(tag): tag for tag in tags}
+        versions = self.cache.get_many(list(keys))
+        for key in keys.keys() - versions.keys():
+            self.cache.add(key, uuid4().hex, None)
+            versions[key] = self.cache.get(key)
+        return {keys[key]: version for key, version in versions.items()}
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if self.get_tag_versions(entry['versions']) != entry['versions']:
+            return None
+        return entry['content']
+
+    def read_versions(self, tags):
+        """Версии тегов до вычисления ответа, для передачи в set()."""
+        return self.get_tag_versions({GLOBAL_TAG, *tags})
+
+    def set(self, key, content, tags, timeout=None, versions=None):
+        """Сохраняет ответ с версиями его тегов.
+
+        versions — версии, прочитанные до чтения базы (read_versions):
+        если тег сбросили, пока ответ вычислялся, запись сразу устареет.
+        Версии остальных тегов, известных только из самого ответа,
+        читаются сейчас.
+        """
+        versions = dict(versions or {})
+        tags = {GLOBAL_TAG, *tags} - versions.keys()
+        versions.update(self.get_tag_versions(tags))
+        self.cache.set(key, {
+            'versions': versions,
+            'content': content,
+        }, timeout or self.timeout)
+
+    def invalidate(self, *tags):
+        self.cache.set_many(
+            {self.tag_key(tag): uuid4().hex for tag in tags}, None
+        )
+
+    def invalidate_on_commit(self, *tags):
+        """Инвалидация после фиксации текущей транзакции.
+
+        Иначе параллельный запрос успел бы прочитать еще не
+        зафиксированное состояние и закэшировать его под новыми версиями
+        тегов. Вне транзакции теги сбрасываются сразу.
+        """
+        transaction.on_commit(lambda: self.invalidate(*tags))
+
+    def invalidate_all(self):
+        self.invalidate(GLOBAL_TAG)
+
+
+def title_cache_tags(title):
+    """Теги сериализованного произведения: само оно, категория и жанры."""
+    tags = {f'title:{title["id"]}'}
+    if title['category']:
+        tags.add(f'category:{title["category"]["slug"]}')
+    tags.update(f'genre:{genre["slug"]}' for genre in title['genre'])
+    return tags
+
+
+response_cache = TaggedCache()
@@ -0,0 +1,122 @@
+"""Журнал изменений каталога для инкрементальной синхронизации клиентов.
+
+Каждое создание, изменение и удаление произведения, отзыва, комментария,
+категории и жанра добавляет в ChangeEvent запись с возрастающим id и
+адресом объекта в API. Клиент запрашивает /changes/?after=<id> и
+перечитывает только изменившиеся объекты. Произведение получает событие
+изменения и тогда, когда меняется его представление: рейтинг, жанры,
+название категории.
+
+Во время каскадного удаления (см. reviews.cascade) события удаляемых
+объектов копятся и записываются одним INSERT после удаления корневого
+объекта.
+
+Сжатие журнала оставляет по одному, последнему событию на объект: любой
+клиент с after меньше удаленного события получит более позднее событие
+того же объекта, поэтому его копия остается согласованной.
+"""
+from django.db.models import Max
+from django.urls import reverse
+
+from reviews import cascade
+from reviews.models import (
+    Category,
+    ChangeEvent,
+    Comment,
+    Review,
+    Title,
+)
+
+
+def get_comment_title_id(comment):
+    """Произведение комментария, если оно известно без запроса."""
+    if Comment.review.is_cached(comment):
+        return comment.review.title_id
+    review = cascade.get_deleting(Review, comment.review_id)
+    return review and review.title_id
+
+
+def comment_path(title_id, review_id, comment_id):
+    return reverse(
+        'api:comments-detail', args=(title_id, review_id, comment_id)
+    )
+
+
+def get_object_path(instance):
+    """Адрес объекта в API на момент события."""
+    if isinstance(instance, Title):
+        return reverse('api:titles-detail', args=(instance.pk,))
+    if isinstance(instance, Review):
+        return reverse(
+            'api:reviews-detail', args=(instance.title_id, instance.pk)
+        )
+    if isinstance(instance, Comment):
+        title_id = get_comment_title_id(instance)
+        if title_id is None:
+            title_id = Review.objects.filter(
+                pk=instance.review_id
+            ).values_list('title_id', flat=True).first()
+        return comment_path(title_id, instance.review_id, instance.pk)
+    basename = 'categories' if isinstance(instance, Category) else 'genres'
+    return f"{reverse(f'api:{basename}-list')}{instance.slug}/"
+
+
+def record_change(instance, action):
+    event = ChangeEvent(
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+    )
+    # Адреса комментариев с неизвестным произведением в каскаде
+    # достраиваются одним запросом при записи событий.
+    review_id = None
+    if (isinstance(instance, Comment)
+            and get_comment_title_id(instance) is None):
+        review_id = instance.review_id
+    else:
+        event.path = get_object_path(instance)
+    if cascade.defer('changes', (event, review_id)):
+        return
+    if review_id is not None:
+        event.path = get_object_path(instance)
+    event.save()
+
+
+@cascade.register_flush('changes')
+def flush_changes(pending):
+    review_ids = {review_id for _, review_id in pending if review_id}
+    titles = dict(Review.objects.filter(pk__in=review_ids).values_list(
+        'pk', 'title_id'
+    )) if review_ids else {}
+    events = []
+    for event, review_id in pending:
+        if review_id is not None:
+            event.path = comment_path(
+                titles.get(review_id), review_id, event.object_id
+            )
+        events.append(event)
+    ChangeEvent.objects.bulk_create(events)
+
+
+def record_title_updates(title_ids):
+    """События изменения произведений, представление которых изменилось."""
+    events = []
+    for title_id in title_ids:
+        event = ChangeEvent(
+            model=Title._meta.model_name,
+            object_id=title_id,
+            action=ChangeEvent.Action.UPDATE,
+            path=reverse('api:titles-detail', args=(title_id,)),
+        )
+        if not cascade.defer('changes', (event, None)):
+            events.append(event)
+    ChangeEvent.objects.bulk_create(events)
+
+
+def compact_changes():
+    """Удаляет события, вытесненные более поздними событиями объекта."""
+    latest = ChangeEvent.objects.values('model', 'object_id').annotate(
+        latest=Max('id')
+    ).values('latest')
+    deleted, _ = ChangeEvent.objects.exclude(id__in=latest).delete()
+    return deleted
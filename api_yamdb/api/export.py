@@ -0,0 +1,95 @@
+"""Строки потоковой выгрузки каталога, отзывов и комментариев.
+
+Таблицы читаются порциями по первичному ключу (`pk > последний`), поэтому
+память не зависит от размера таблицы, а каждая порция — это один
+индексный запрос. Выгрузка не является согласованным снимком: строки,
+измененные во время выгрузки, могут попасть в нее в любом состоянии.
+"""
+from collections import defaultdict
+
+from reviews.models import Comment, GenreTitle, Review, Title
+
+TITLE_FIELDS = (
+    'id', 'name', 'year', 'description', 'category', 'genre', 'rating',
+    'review_count', 'updated_at',
+)
+REVIEW_FIELDS = (
+    'id', 'title_id', 'author', 'text', 'score', 'pub_date', 'updated_at',
+)
+COMMENT_FIELDS = (
+    'id', 'review_id', 'title_id', 'author', 'text', 'pub_date',
+    'updated_at',
+)
+
+
+def iterate_chunks(queryset, chunk_size):
+    """Порции словарей queryset.values() по возрастанию pk."""
+    last_pk = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1]['id']
+
+
+def rename(rows, **names):
+    """Переименовывает ключи values(): имена полей модели заняты."""
+    for row in rows:
+        for new, old in names.items():
+            row[new] = row.pop(old)
+        yield row
+
+
+def filter_since(queryset, since):
+    if since is None:
+        return queryset
+    return queryset.filter(updated_at__gte=since)
+
+
+def title_rows(since=None, chunk_size=1000):
+    titles = filter_since(Title.objects.all(), since).values(
+        'id', 'name', 'year', 'description', 'rating', 'review_count',
+        'updated_at', 'category__slug',
+    )
+    for chunk in iterate_chunks(titles, chunk_size):
+        genres = defaultdict(list)
+        for title_id, slug in GenreTitle.objects.filter(
+            title_id__in=[title['id'] for title in chunk]
+        ).order_by('genre__slug').values_list('title_id', 'genre__slug'):
+            genres[title_id].append(slug)
+        for title in rename(chunk, category='category__slug'):
+            title['genre'] = genres[title['id']]
+            yield title
+
+
+def review_rows(since=None, chunk_size=1000):
+    reviews = filter_since(Review.objects.all(), since).values(
+        'id', 'title_id', 'text', 'score', 'pub_date', 'updated_at',
+        'author__username',
+    )
+    for chunk in iterate_chunks(reviews, chunk_size):
+        yield from rename(chunk, author='author__username')
+
+
+def comment_rows(since=None, chunk_size=1000):
+    comments = filter_since(Comment.objects.all(), since).values(
+        'id', 'review_id', 'text', 'pub_date', 'updated_at',
+        'review__title_id', 'author__username',
+    )
+    for chunk in iterate_chunks(comments, chunk_size):
+        yield from rename(
+            chunk, title_id='review__title_id', author='author__username'
+        )
+
+
+EXPORTS = {
+    'titles': (title_rows, TITLE_FIELDS),
+    'reviews': (review_rows, REVIEW_FIELDS),
+    'comments': (comment_rows, COMMENT_FIELDS),
+}
@@ -1,14 +1,19 @@
 import django_filters
+from django.db.models import Exists, OuterRef
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 
-from reviews.models import Title
+from reviews.models import GenreTitle, Title
+from reviews.search import get_search_backend
 
 
 class TitleFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(
         field_name='name',
         lookup_expr='icontains')
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')),
+        method='filter_genre_mode',
     )
     category = django_filters.CharFilter(
         field_name='category__slug',
@@ -16,4 +21,60 @@ class TitleFilter(django_filters.FilterSet):
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'genre', 'category')
+        fields = ('name', 'year', 'genre', 'genre_mode', 'category')
+
+    def filter_genre(self, queryset, name, value):
+        """Жанры через запятую: `any` — хотя бы один, `all` — все.
+
+        Каждое условие — коррелированный EXISTS по связи жанр-произведение
+        (индекс uniq_genre_title), поэтому фильтр не добавляет соединений
+        к основному запросу и не размножает строки.
+        """
+        slugs = {slug.strip() for slug in value.split(',') if slug.strip()}
+        if not slugs:
+            return queryset
+        links = GenreTitle.objects.filter(title=OuterRef('pk'))
+        if self.form.cleaned_data.get('genre_mode') == 'all':
+            return queryset.filter(*(
+                Exists(links.filter(genre__slug=slug)) for slug in slugs
+            ))
+        return queryset.filter(Exists(links.filter(genre__slug__in=slugs)))
+
+    def filter_genre_mode(self, queryset, name, value):
+        """Режим учитывается в filter_genre."""
+        return queryset
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по `?search=` или `?q=` с сортировкой по
+    релевантности."""
+    search_params = ('search', 'q')
+
+    def filter_queryset(self, request, queryset, view):
+        for param in self.search_params:
+            query = request.query_params.get(param, '').strip()
+            if query:
+                return get_search_backend(queryset.db).search(
+                    queryset, query
+                )
+        return queryset
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """`?ordering=` по сохраненным полям с замыкающим `id`.
+
+    `id` берет направление последнего поля: порядок остается полным для
+    курсорной пагинации и совпадает с индексом (поле, id) при обходе в
+    любую сторону. Явная сортировка заменяет сортировку по релевантности
+    поиска.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        names = {field.lstrip('-') for field in ordering}
+        if names & {'pk', 'id'}:
+            return ordering
+        direction = '-' if ordering[-1].startswith('-') else ''
+        return [*ordering, f'{direction}id']
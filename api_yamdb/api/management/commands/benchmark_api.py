@@ -0,0 +1,357 @@
+"""Замер задержек всех маршрутов API через тестовый клиент Django.
+
+Каждый сценарий выполняется --requests раз. Для него считаются
+перцентили задержки, число SQL-запросов и размер ответа, а результаты
+записываются в JSON, чтобы прогоны на разных коммитах можно было
+сравнивать. С --test-db замер идет на временной базе с синтетическими
+данными из generate_data.
+"""
+import json
+import platform
+import re
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.middleware import QueryTracker
+from reviews.models import Category, Genre, Review, Title, User
+
+API = '/api/v1'
+PREFIX = 'benchmark'
+
+Scenario = namedtuple('Scenario', 'name method path data client')
+
+
+def get_search_word(name):
+    """Самое длинное слово названия для сценария поиска: в названиях
+    бывает одно слово, а числа и знаки ничего не находят."""
+    words = re.findall(r'[^\W\d_]+', name)
+    return max(words, key=len, default=name.strip())
+
+
+def percentile(values, share):
+    """Перцентиль с линейной интерполяцией между соседними значениями."""
+    values = sorted(values)
+    position = (len(values) - 1) * share
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(scenario, paths, timings, queries, sizes, statuses):
+    return {
+        'method': scenario.method,
+        'path': paths[0],
+        'client': scenario.client,
+        'statuses': sorted(set(statuses)),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'queries_mean': round(statistics.fmean(queries), 2),
+        'queries_max': max(queries),
+        'bytes_mean': round(statistics.fmean(sizes)),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Измеряет задержку, число запросов и размер ответов API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Число запросов в каждом сценарии.',
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для результатов в формате JSON.',
+        )
+        parser.add_argument(
+            '--only', nargs='*',
+            help='Запустить только сценарии с этими именами.',
+        )
+        parser.add_argument(
+            '--test-db', action='store_true',
+            help='Создать временную базу и заполнить ее generate_data.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора данных для --test-db.',
+        )
+
+    def handle(self, *args, **options):
+        old_name = None
+        try:
+            if options['test_db']:
+                old_name = connection.creation.create_test_db(verbosity=0)
+                call_command(
+                    'generate_data', seed=options['seed'],
+                    stdout=self.stdout,
+                )
+            results = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        report = {
+            'revision': git_revision(),
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'scenarios': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}.'
+        ))
+
+    def run(self, options):
+        self.prepare()
+        results = {}
+        for scenario in self.get_scenarios():
+            if options['only'] and scenario.name not in options['only']:
+                continue
+            results[scenario.name] = self.measure(
+                scenario, options['requests']
+            )
+            row = results[scenario.name]
+            self.stdout.write(
+                f'{scenario.name:<22} p50 {row["p50_ms"]:>8.2f} мс  '
+                f'p95 {row["p95_ms"]:>8.2f} мс  '
+                f'p99 {row["p99_ms"]:>8.2f} мс  '
+                f'{row["queries_mean"]:>6.1f} запр.  '
+                f'{row["bytes_mean"]:>8} байт'
+            )
+        return results
+
+    def measure(self, scenario, requests):
+        client = self.clients[scenario.client]
+        send = getattr(client, scenario.method.lower())
+        paths, timings, queries, sizes, statuses = [], [], [], [], []
+        for index in range(requests):
+            path = scenario.path(index)
+            kwargs = {}
+            if scenario.data:
+                kwargs = {'data': scenario.data(index), 'format': 'json'}
+            tracker = QueryTracker()
+            started = time.perf_counter()
+            with connection.execute_wrapper(tracker):
+                response = send(path, **kwargs)
+                content = (
+                    b''.join(response.streaming_content)
+                    if response.streaming else response.content
+                )
+            timings.append(time.perf_counter() - started)
+            paths.append(path)
+            queries.append(tracker.count)
+            sizes.append(len(content))
+            statuses.append(response.status_code)
+        return summarize(scenario, paths, timings, queries, sizes, statuses)
+
+    def prepare(self):
+        """Пользователи и объекты, к которым обращаются сценарии."""
+        admin, _ = User.objects.get_or_create(
+            username=f'{PREFIX}_admin',
+            defaults={'email': f'{PREFIX}_admin@yamdb.fake', 'role': 'admin'},
+        )
+        user, _ = User.objects.get_or_create(
+            username=f'{PREFIX}_user',
+            defaults={'email': f'{PREFIX}_user@yamdb.fake'},
+        )
+        self.clients = {'anonymous': APIClient()}
+        for name, account in (('admin', admin), ('user', user)):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(account)}'
+            )
+            self.clients[name] = client
+        self.token_user = user
+        self.title = Title.objects.order_by('-review_count', 'pk').first()
+        self.review = Review.objects.annotate(
+            comment_total=Count('comments')
+        ).order_by('-comment_total', 'pk').first()
+        if self.title is None or self.review is None:
+            raise CommandError(
+                'Нет данных для замера: запустите generate_data или '
+                'используйте --test-db.'
+            )
+        self.comment = self.review.comments.first()
+        self.category = Category.objects.first()
+        self.genre = Genre.objects.first()
+        self.word = get_search_word(self.title.name)
+
+    def get_scenarios(self):
+        """Сценарии в порядке выполнения: удаление идет после создания."""
+        title, review, comment = self.title, self.review, self.comment
+        titles = f'{API}/titles/'
+        reviews = f'{titles}{review.title_id}/reviews/'
+        comments = f'{reviews}{review.pk}/comments/'
+        code = default_token_generator.make_token(self.token_user)
+        batch_ids = ','.join(str(pk) for pk in Title.objects.order_by(
+            '-review_count', 'pk'
+        ).values_list('pk', flat=True)[:50])
+
+        def fixed(path):
+            return lambda index: path
+
+        def bench_title(index):
+            return Title.objects.get(name=f'{PREFIX} title {index}').pk
+
+        return (
+            Scenario('auth-signup', 'POST', fixed(f'{API}/auth/signup/'),
+                     lambda i: {'username': f'{PREFIX}_signup_{i}',
+                                'email': f'{PREFIX}_signup_{i}@yamdb.fake'},
+                     'anonymous'),
+            Scenario('auth-token', 'POST', fixed(f'{API}/auth/token/'),
+                     lambda i: {'username': self.token_user.username,
+                                'confirmation_code': code},
+                     'anonymous'),
+            Scenario('users-list', 'GET', fixed(f'{API}/users/'), None,
+                     'admin'),
+            Scenario('users-create', 'POST', fixed(f'{API}/users/'),
+                     lambda i: {'username': f'{PREFIX}_new_{i}',
+                                'email': f'{PREFIX}_new_{i}@yamdb.fake'},
+                     'admin'),
+            Scenario('users-detail', 'GET',
+                     lambda i: f'{API}/users/{PREFIX}_new_{i}/', None,
+                     'admin'),
+            Scenario('users-update', 'PATCH',
+                     lambda i: f'{API}/users/{PREFIX}_new_{i}/',
+                     lambda i: {'bio': f'bio {i}'}, 'admin'),
+            Scenario('users-delete', 'DELETE',
+                     lambda i: f'{API}/users/{PREFIX}_new_{i}/', None,
+                     'admin'),
+            Scenario('users-me', 'GET', fixed(f'{API}/users/me/'), None,
+                     'user'),
+            Scenario('users-me-update', 'PATCH', fixed(f'{API}/users/me/'),
+                     lambda i: {'bio': f'bio {i}'}, 'user'),
+            Scenario('categories-list', 'GET', fixed(f'{API}/categories/'),
+                     None, 'anonymous'),
+            Scenario('categories-create', 'POST',
+                     fixed(f'{API}/categories/'),
+                     lambda i: {'name': f'Category {i}',
+                                'slug': f'{PREFIX}-category-{i}'},
+                     'admin'),
+            Scenario('categories-delete', 'DELETE',
+                     lambda i: f'{API}/categories/{PREFIX}-category-{i}/',
+                     None, 'admin'),
+            Scenario('genres-list', 'GET', fixed(f'{API}/genres/'), None,
+                     'anonymous'),
+            Scenario('genres-create', 'POST', fixed(f'{API}/genres/'),
+                     lambda i: {'name': f'Genre {i}',
+                                'slug': f'{PREFIX}-genre-{i}'},
+                     'admin'),
+            Scenario('genres-delete', 'DELETE',
+                     lambda i: f'{API}/genres/{PREFIX}-genre-{i}/', None,
+                     'admin'),
+            Scenario('titles-list', 'GET', fixed(titles), None, 'anonymous'),
+            Scenario('titles-list-auth', 'GET', fixed(titles), None, 'user'),
+            Scenario('titles-filter', 'GET',
+                     fixed(f'{titles}?genre={self.genre.slug}'
+                           f'&category={self.category.slug}'),
+                     None, 'user'),
+            Scenario('titles-search', 'GET',
+                     fixed(f'{titles}?search={quote(self.word)}'), None,
+                     'user'),
+            Scenario('titles-top-rated', 'GET',
+                     fixed(f'{titles}?category={self.category.slug}'
+                           f'&ordering=-rating&pagination=cursor'),
+                     None, 'user'),
+            Scenario('titles-top', 'GET',
+                     fixed(f'{titles}top/?genre={self.genre.slug}'), None,
+                     'anonymous'),
+            Scenario('titles-cursor', 'GET',
+                     fixed(f'{titles}?pagination=cursor'), None, 'user'),
+            Scenario('titles-detail', 'GET', fixed(f'{titles}{title.pk}/'),
+                     None, 'user'),
+            Scenario('titles-detail-expand', 'GET',
+                     fixed(f'{titles}{title.pk}/'
+                           f'?expand=reviews,comment_counts'),
+                     None, 'user'),
+            Scenario('titles-batch', 'GET',
+                     fixed(f'{titles}batch/?ids={batch_ids}'), None,
+                     'anonymous'),
+            Scenario('titles-rating', 'GET',
+                     fixed(f'{titles}{title.pk}/rating/'), None, 'anonymous'),
+            Scenario('titles-create', 'POST', fixed(titles),
+                     lambda i: {'name': f'{PREFIX} title {i}', 'year': 2000,
+                                'description': 'benchmark',
+                                'genre': [self.genre.slug],
+                                'category': self.category.slug},
+                     'admin'),
+            Scenario('titles-update', 'PATCH',
+                     lambda i: f'{titles}{bench_title(i)}/',
+                     lambda i: {'description': f'updated {i}'}, 'admin'),
+            Scenario('reviews-list', 'GET', fixed(reviews), None, 'user'),
+            Scenario('reviews-list-slim', 'GET',
+                     fixed(f'{reviews}?representation=slim'), None, 'user'),
+            Scenario('reviews-detail', 'GET', fixed(f'{reviews}{review.pk}/'),
+                     None, 'user'),
+            Scenario('reviews-create', 'POST',
+                     lambda i: f'{titles}{bench_title(i)}/reviews/',
+                     lambda i: {'text': 'benchmark', 'score': i % 10 + 1},
+                     'admin'),
+            Scenario('reviews-update', 'PATCH',
+                     lambda i: '{}{}/reviews/{}/'.format(
+                         titles, bench_title(i),
+                         Review.objects.get(title_id=bench_title(i)).pk,
+                     ),
+                     lambda i: {'score': 10 - i % 10}, 'admin'),
+            Scenario('comments-list', 'GET', fixed(comments), None, 'user'),
+            Scenario('comments-detail', 'GET',
+                     fixed(f'{comments}{comment.pk}/'), None, 'user'),
+            Scenario('comments-create', 'POST', fixed(comments),
+                     lambda i: {'text': f'{PREFIX} comment {i}'}, 'admin'),
+            Scenario('comments-update', 'PATCH',
+                     lambda i: '{}{}/'.format(comments, review.comments.get(
+                         text=f'{PREFIX} comment {i}'
+                     ).pk),
+                     lambda i: {'text': f'{PREFIX} comment {i}'}, 'admin'),
+            Scenario('comments-delete', 'DELETE',
+                     lambda i: '{}{}/'.format(comments, review.comments.get(
+                         text=f'{PREFIX} comment {i}'
+                     ).pk),
+                     None, 'admin'),
+            Scenario('reviews-delete', 'DELETE',
+                     lambda i: '{}{}/reviews/{}/'.format(
+                         titles, bench_title(i),
+                         Review.objects.get(title_id=bench_title(i)).pk,
+                     ),
+                     None, 'admin'),
+            Scenario('titles-delete', 'DELETE',
+                     lambda i: f'{titles}{bench_title(i)}/', None, 'admin'),
+            Scenario('export-titles', 'GET', fixed(f'{API}/export/titles/'),
+                     None, 'admin'),
+            Scenario('export-reviews', 'GET',
+                     fixed(f'{API}/export/reviews/?format=csv'), None,
+                     'admin'),
+            Scenario('export-comments', 'GET',
+                     fixed(f'{API}/export/comments/'), None, 'admin'),
+            Scenario('changes', 'GET', fixed(f'{API}/changes/'),
+                     None, 'user'),
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из журнала изменений вытесненные события.'
+
+    def handle(self, *args, **options):
+        deleted = compact_changes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено событий: {deleted}.'
+        ))
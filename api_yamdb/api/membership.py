@@ -0,0 +1,125 @@
+"""Битовые карты существующих id произведений и отзывов.
+
+Вложенные адреса /titles/<id>/reviews/ и .../reviews/<id>/comments/
+перебирают боты, и каждый промах стоил запроса к БД перед ответом 404.
+Карта в памяти процесса отвечает «точно нет» без обращения к ORM для id,
+удаление которых этот процесс видел зафиксированным. «Возможно есть»
+проверяет обычный запрос к БД.
+
+Ложный ответ «возможно есть» безопасен, поэтому бит созданного объекта
+ставится сразу, а снимается только после фиксации удаления. id выше
+загруженного максимума могли создать другие процессы — они всегда
+проверяются в БД. Снятый бит id не выше максимума тоже не окончательный
+ответ: строку мог вставить другой процесс с явным id (import_csv) или
+транзакция, зафиксированная позже соседних. Такой промах подтверждается
+одним запросом exists(), а найденный id ставится в карту. Карта
+перезагружается раз в API_ID_BITMAP_TTL секунд, после migrate и flush.
+
+id читаются потоком, без списка в памяти. Первая загрузка идет в запросе,
+которому карта понадобилась, и входит в его бюджет SQL-запросов. Истекшая
+карта продолжает отвечать — устаревшие биты безопасны по тем же
+причинам, — а перезагружается после отправки ответа, как снимки
+каталога (см. api.snapshots).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from reviews.models import Review, Title
+
+LOAD_CHUNK_SIZE = 10000
+
+_state = threading.local()
+
+
+class IdBitmap:
+
+    def __init__(self, model):
+        self.model = model
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.bits = None
+        self.deleted = set()
+        self.loaded_max = 0
+        self.loaded_at = 0.0
+
+    def get_ttl(self):
+        return getattr(settings, 'API_ID_BITMAP_TTL', 300)
+
+    def load(self):
+        """Читает id по возрастанию, расширяя карту по мере чтения."""
+        bits = bytearray(1)
+        loaded_max = 0
+        for pk in self.model.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ).iterator(chunk_size=LOAD_CHUNK_SIZE):
+            if pk >> 3 >= len(bits):
+                bits.extend(bytes((pk >> 3) + 1 - len(bits)))
+            bits[pk >> 3] |= 1 << (pk & 7)
+            loaded_max = pk
+        with self.lock:
+            self.bits, self.loaded_max = bits, loaded_max
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        if self.bits is None:
+            self.load()
+        elif time.monotonic() - self.loaded_at > self.get_ttl():
+            if getattr(_state, 'in_request', False):
+                _state.pending = getattr(_state, 'pending', set()) | {self}
+            else:
+                self.load()
+
+    def known_deleted(self, pk):
+        """True — процесс видел зафиксированное удаление этого id."""
+        return self.get_ttl() is not None and int(pk) in self.deleted
+
+    def might_exist(self, pk):
+        """False — объекта с таким id точно нет."""
+        pk = int(pk)
+        if self.get_ttl() is None:
+            return True
+        if pk in self.deleted:
+            return False
+        self.ensure_loaded()
+        if pk > self.loaded_max or self.bits[pk >> 3] & (1 << (pk & 7)):
+            return True
+        exists = self.model.objects.filter(pk=pk).exists()
+        if exists:
+            self.add(pk)
+        return exists
+
+    def add(self, pk):
+        with self.lock:
+            self.deleted.discard(pk)
+            if self.bits is not None and pk <= self.loaded_max:
+                self.bits[pk >> 3] |= 1 << (pk & 7)
+
+    def discard(self, pk):
+        with self.lock:
+            if self.bits is None:
+                return
+            self.deleted.add(pk)
+            if pk <= self.loaded_max:
+                self.bits[pk >> 3] &= ~(1 << (pk & 7))
+
+
+def begin_request():
+    _state.in_request = True
+
+
+def finish_request():
+    """Перезагружает карты, истекшие во время запроса."""
+    _state.in_request = False
+    pending = getattr(_state, 'pending', set())
+    _state.pending = set()
+    for bitmap in pending:
+        bitmap.load()
+
+
+title_ids = IdBitmap(Title)
+review_ids = IdBitmap(Review)
+ID_BITMAPS = {Title: title_ids, Review: review_ids}
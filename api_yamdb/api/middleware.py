@@ -0,0 +1,116 @@
+"""Бюджет SQL-запросов на запрос к API.
+
+Middleware считает запросы к базе и суммарное время их выполнения, а
+также находит повторы одного и того же SQL (признак N+1). Бюджет
+объявляется на классе вьюсета атрибутом query_budget: числом или
+словарем {действие: число}. При QUERY_BUDGET_STRICT превышение бюджета
+прерывает запрос исключением, иначе пишется предупреждение в журнал
+api.queries с отчетом в поле query_report.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('api.queries')
+
+# Повторы управляющих транзакциями команд (BEGIN, SAVEPOINT) не N+1.
+DATA_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к API превысил бюджет SQL-запросов."""
+
+
+class QueryTracker:
+    """execute_wrapper, собирающий число, время и формы запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.monotonic() - started
+            self.count += 1
+            if sql.lstrip()[:6].upper() in DATA_STATEMENTS:
+                self.shapes[sql] += 1
+
+    def duplicates(self, limit):
+        return {
+            sql: count for sql, count in self.shapes.items() if count > limit
+        }
+
+
+def get_view_budget(view_func, method):
+    """Бюджет и имя действия вьюсета DRF, обрабатывающего запрос."""
+    view_class = getattr(view_func, 'cls', None)
+    budget = getattr(view_class, 'query_budget', None)
+    action = getattr(view_func, 'actions', {}).get(method.lower())
+    if isinstance(budget, dict):
+        budget = budget.get(action)
+    duplicates = getattr(
+        view_class, 'query_duplicate_limit',
+        getattr(settings, 'QUERY_BUDGET_DUPLICATE_LIMIT', 3),
+    )
+    name = view_class and f'{view_class.__name__}.{action}'
+    return name, budget, duplicates
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tracker = QueryTracker()
+        request.query_budget = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            response = self.get_response(request)
+        # Ответ 500 не проверяется: запросы страницы ошибки превышают
+        # бюджет, и исключение бюджета скрыло бы настоящую ошибку.
+        if (
+            request.query_budget is not None
+            and response.status_code < 500
+        ):
+            self.check_budget(request, tracker, *request.query_budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name, budget, duplicates = get_view_budget(view_func, request.method)
+        if name is not None:
+            request.query_budget = (name, budget, duplicates)
+
+    def check_budget(self, request, tracker, view, budget, duplicate_limit):
+        duplicates = tracker.duplicates(duplicate_limit)
+        over_budget = budget is not None and tracker.count > budget
+        if not over_budget and not duplicates:
+            return
+        report = {
+            'view': view,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'queries': tracker.count,
+            'budget': budget,
+            'sql_time_ms': round(tracker.duration * 1000, 2),
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in duplicates.items()
+            ],
+        }
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(json.dumps(report, ensure_ascii=False))
+        logger.warning(
+            'Превышен бюджет запросов %s: %s из %s',
+            view, tracker.count, budget, extra={'query_report': report},
+        )
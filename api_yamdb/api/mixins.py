@@ -1,23 +1,286 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.viewsets import mixins, GenericViewSet
 from rest_framework.filters import SearchFilter
 
+from api import snapshots
+from api.cache import response_cache
+from api.pagination import OptionalKeysetPagination
+
 """Вынес миксины в отдельный файл и добавил для тайтлов."""
 
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_not_modified_response(request, etag, last_modified):
+    """Ответ 304, если условный запрос совпал с валидаторами, иначе None."""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+    )
+    if response is not None:
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = last_modified
+    return response
+
+
+def normalize_query(request):
+    return sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+    )
+
+
+class CachedResponseMixin:
+    """Кэш анонимных GET-ответов с инвалидацией по тегам."""
+    cache_tags = ()
+
+    def get_request_cache_tags(self):
+        """Теги ответа, известные до его вычисления; их версии читаются
+        до обращения к базе."""
+        return set(self.cache_tags)
+
+    def get_response_cache_tags(self, data):
+        """Теги, при изменении которых ответ устаревает."""
+        return self.cache_tags
+
+    def get_response_cache_key(self, request):
+        return response_cache.make_key(
+            request.get_host(), self.basename, self.action,
+            sorted(self.kwargs.items()), normalize_query(request),
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        cached = response_cache.get(key)
+        if cached is not None:
+            headers = cached['headers']
+            if 'ETag' in headers:
+                not_modified = get_not_modified_response(
+                    request, headers['ETag'], headers.get('Last-Modified')
+                )
+                if not_modified is not None:
+                    return not_modified
+            return Response(cached['data'], headers=headers)
+        versions = response_cache.read_versions(self.get_request_cache_tags())
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, {
+                'data': response.data,
+                'headers': {
+                    header: response[header]
+                    for header in VALIDATOR_HEADERS if header in response
+                },
+            }, self.get_response_cache_tags(response.data), versions=versions)
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class SnapshotListMixin:
+    """Отдает анонимные списки из снимков на диске (см. api.snapshots)."""
+
+    def list(self, request, *args, **kwargs):
+        page = snapshots.get_snapshot_page(request)
+        if page is None:
+            return super().list(request, *args, **kwargs)
+        # Поколение читается до базы: ответ, прочитанный до фиксации
+        # изменения каталога, попадет в уже отмененное поколение.
+        generation = snapshots.get_generation(self.basename)
+        if not getattr(request._request, 'snapshot_rebuild', False):
+            response = self.get_snapshot_response(request, generation, page)
+            if response is not None:
+                return response
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            snapshots.write_snapshot(
+                request, self.basename, generation, page,
+                request.accepted_renderer.render(
+                    response.data, request.accepted_media_type,
+                    self.get_renderer_context(),
+                ),
+            )
+        return response
+
+    def get_snapshot_response(self, request, generation, page):
+        content = snapshots.read_snapshot(
+            request, self.basename, generation, page
+        )
+        if content is None:
+            return None
+        etag = snapshots.content_etag(content)
+        response = get_not_modified_response(request, etag, None)
+        if response is None:
+            gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+            if gzipped:
+                compressed = snapshots.read_snapshot(
+                    request, self.basename, generation, page, gzipped=True
+                )
+                gzipped = compressed is not None
+            response = HttpResponse(
+                compressed if gzipped else content,
+                content_type=request.accepted_media_type,
+            )
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+            response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ConditionalResponseMixin:
+    """ETag и Last-Modified по полям `updated_at` без сериализации.
+
+    Валидаторы объекта считаются одним агрегирующим запросом по его
+    первичному ключу: максимальная дата изменения объекта (и родителей из
+    `last_modified_fields`). Валидаторы списка по умолчанию — число
+    объектов и максимальная дата изменения по отфильтрованному queryset;
+    вложенные списки переопределяют get_list_state и берут их из
+    сохраненного состояния родителя. В режиме курсора агрегат по всему
+    списку не считается, и ответ отдается без валидаторов.
+    """
+    last_modified_fields = ('updated_at',)
+
+    def get_state(self, queryset):
+        """Число объектов и дата последнего изменения queryset."""
+        state = queryset.order_by().aggregate(
+            count=Count('pk'),
+            **{
+                f'modified_{index}': Max(field)
+                for index, field in enumerate(self.last_modified_fields)
+            },
+        )
+        count = state.pop('count')
+        modified = [value for value in state.values() if value is not None]
+        return count, max(modified) if modified else None
+
+    def get_object_state(self):
+        """Состояние объекта из URL; значение не того типа — 404, как в
+        get_object()."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        return self.get_state(queryset)
+
+    def get_list_state(self, request):
+        """Версия и дата изменения списка; None — список без валидаторов."""
+        is_cursor_mode = getattr(self.paginator, 'is_cursor_mode', None)
+        if is_cursor_mode is not None and is_cursor_mode(request):
+            return None
+        return self.get_state(self.filter_queryset(self.get_queryset()))
+
+    def get_validators(self, request):
+        if self.action == 'retrieve':
+            state = self.get_object_state()
+        else:
+            state = self.get_list_state(request)
+        if state is None:
+            return None
+        version, last_modified = state
+        fingerprint = (
+            f'{request.path}|{normalize_query(request)}|{version}|'
+            f'{last_modified and last_modified.isoformat()}'
+        )
+        etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+        return etag, last_modified and http_date(last_modified.timestamp())
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators(request)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = validators
+        not_modified = get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = last_modified
+        return response
+
+
+class ConditionalListMixin(ConditionalResponseMixin):
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class SlimRepresentationMixin:
+    """Облегченное представление `?representation=slim` сериализатором
+    slim_serializer_class."""
+    representation_query_param = 'representation'
+    slim_serializer_class = None
+
+    def is_slim(self):
+        """Запрошено ли облегченное представление `?representation=slim`."""
+        return self.request.query_params.get(
+            self.representation_query_param
+        ) == 'slim'
+
+    def get_serializer_class(self):
+        if self.is_slim():
+            return self.slim_serializer_class
+        return super().get_serializer_class()
+
 
 class CreateDestroyViewSet(
+    SnapshotListMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
     GenericViewSet
 ):
     filter_backends = (SearchFilter,)
-    pagination_class = PageNumberPagination
+    pagination_class = OptionalKeysetPagination
     search_fields = ('name',)
     lookup_field = 'slug'
+    query_budget = {'list': 2, 'create': 5, 'destroy': 8}
 
 
 class TitleViewSet(
+    SnapshotListMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
@@ -25,10 +288,13 @@ class TitleViewSet(
     mixins.RetrieveModelMixin,
     GenericViewSet
 ):
-    pagination_class = PageNumberPagination
+    pagination_class = OptionalKeysetPagination
 
 
 class ReviewCommentViewSet(
+    SlimRepresentationMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
@@ -36,4 +302,4 @@ class ReviewCommentViewSet(
     mixins.UpdateModelMixin,
     GenericViewSet
 ):
-    pass
+    pagination_class = OptionalKeysetPagination
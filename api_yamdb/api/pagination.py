@@ -0,0 +1,262 @@
+import json
+import operator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки без COUNT(*) и OFFSET.
+
+    Курсор хранит значения полей сортировки последней (или первой)
+    записи страницы, следующая страница выбирается условием
+    `(a, b, id) > (x, y, z)`, поэтому стоимость любой страницы равна
+    стоимости первой при наличии индекса по тем же полям.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    unsupported_ordering_message = (
+        'Курсорная пагинация недоступна для этой сортировки.'
+    )
+    page_size = api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        reverse, position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(
+                position, reverse
+            ))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_ordering(self, queryset):
+        """Сортировка запроса, дополненная уникальным `pk`."""
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        if not all(isinstance(field, str) for field in ordering):
+            raise ParseError(self.unsupported_ordering_message)
+        names = {field.lstrip('-') for field in ordering}
+        # Аннотации (например, релевантность поиска) и поля связанных
+        # моделей не восстановить из объекта страницы для курсора.
+        try:
+            for name in names:
+                self.get_field(name)
+        except FieldDoesNotExist:
+            raise ParseError(self.unsupported_ordering_message)
+        if not names & {'pk', 'id'}:
+            direction = '-' if ordering and ordering[-1][0] == '-' else ''
+            ordering.append(f'{direction}pk')
+        return [
+            (field.lstrip('-'), field.startswith('-')) for field in ordering
+        ]
+
+    def get_field(self, name):
+        if name == 'pk':
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def get_order_by(self, reverse):
+        order_by = []
+        for name, descending in self.ordering:
+            nulls = {}
+            if self.get_field(name).null:
+                nulls = {'nulls_first': True} if reverse else {
+                    'nulls_last': True
+                }
+            if descending != reverse:
+                order_by.append(F(name).desc(**nulls))
+            else:
+                order_by.append(F(name).asc(**nulls))
+        return order_by
+
+    def get_position_filter(self, position, reverse):
+        """Условие `строка после position` в порядке обхода.
+
+        NULL-значения всегда идут в конце прямого обхода.
+        """
+        terms = []
+        prefix = Q()
+        for (name, descending), value in zip(self.ordering, position):
+            lookup = 'lt' if descending != reverse else 'gt'
+            nullable = self.get_field(name).null
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if reverse else None
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{lookup}': value})
+                if nullable and not reverse:
+                    after |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            if after is not None:
+                terms.append(prefix & after)
+            prefix &= equal
+        condition = reduce(operator.or_, terms)
+
+        name, descending = self.ordering[0]
+        first = position[0]
+        if first is not None and not self.get_field(name).null:
+            lookup = 'lte' if descending != reverse else 'gte'
+            condition &= Q(**{f'{name}__{lookup}': first})
+        return condition
+
+    def get_position(self, instance):
+        return [
+            self.get_field(name).value_from_object(instance)
+            for name, _ in self.ordering
+        ]
+
+    def encode_cursor(self, instance, reverse):
+        position = [
+            self.get_field(name).value_to_string(instance)
+            if value is not None else None
+            for (name, _), value in zip(
+                self.ordering, self.get_position(instance)
+            )
+        ]
+        payload = json.dumps({'r': int(reverse), 'p': position})
+        token = urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+        try:
+            payload = json.loads(urlsafe_b64decode(token.encode()))
+            reverse = bool(payload['r'])
+            position = [
+                self.get_field(name).to_python(value)
+                if value is not None else None
+                for (name, _), value in zip(self.ordering, payload['p'])
+            ]
+            if len(position) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, ValidationError,
+                FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_schema_fields(self, view):
+        return []
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """Постраничная пагинация с включаемым по запросу режимом курсора.
+
+    Режим курсора включается параметром `?pagination=cursor`; ссылки
+    `next`/`previous` в этом режиме несут параметр `cursor`.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    keyset_pagination_class = KeysetPagination
+
+    def is_cursor_mode(self, request):
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == self.cursor_mode
+            or self.keyset_pagination_class.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.is_cursor_mode(request):
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class ChangeFeedPagination(BasePagination):
+    """Порции журнала изменений после номера `?after=<id>`.
+
+    `last_seq` — номер, который клиент передает в следующий запрос; он
+    не меняется, пока новых событий нет.
+    """
+    after_query_param = 'after'
+    invalid_after_message = 'Параметр after должен быть целым числом.'
+    page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        after = request.query_params.get(self.after_query_param, '0')
+        if not after.isdigit():
+            raise ParseError(self.invalid_after_message)
+        self.after = int(after)
+        results = list(
+            queryset.filter(pk__gt=self.after).order_by('pk')[
+                :self.page_size + 1
+            ]
+        )
+        self.has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_last_seq(self):
+        return self.page[-1].pk if self.page else self.after
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.after_query_param,
+            self.get_last_seq(),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('last_seq', self.get_last_seq()),
+            ('results', data),
+        ]))
+
+    def get_schema_fields(self, view):
+        return []
@@ -0,0 +1,51 @@
+"""Построчные форматы для потоковой выгрузки данных."""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """Файлоподобный объект, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Один JSON-объект на строку."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+    def stream(self, rows, fields=None):
+        for row in rows:
+            yield json.dumps(row, cls=DjangoJSONEncoder,
+                             ensure_ascii=False) + '\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV с заголовком; списки записываются через запятую."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return ''.join(self.stream(rows, fields)).encode(self.charset)
+
+    def stream(self, rows, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([
+                ','.join(map(str, value)) if isinstance(value, list)
+                else value
+                for value in (row[field] for field in fields)
+            ])
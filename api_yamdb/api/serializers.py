@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
 from reviews.models import (
+    ChangeEvent,
+    LeaderboardEntry,
     Title,
     Genre,
     Category,
@@ -8,6 +10,7 @@ from reviews.models import (
     Comment,
     Review,
 )
+from reviews.ratings import HISTOGRAM_FIELDS, get_histogram
 
 BLACK_LIST_USERNAMES = ('me',)
 
@@ -95,7 +98,10 @@ class TitleSerializer(serializers.ModelSerializer):
         slug_field='slug')
 
     class Meta:
-        fields = '__all__'
+        exclude = (
+            'rating_sum', 'review_count', 'rating', 'score', 'updated_at',
+            *HISTOGRAM_FIELDS,
+        )
         model = Title
 
 
@@ -103,11 +109,43 @@ class TitleSerializerReadOnly(serializers.ModelSerializer):
     """Тайтл сериализатор для рид онли запросов."""
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        exclude = (
+            'rating_sum', 'review_count', 'score', 'updated_at',
+            *HISTOGRAM_FIELDS,
+        )
+        model = Title
+
+
+class TitleExpandedSerializer(TitleSerializerReadOnly):
+    """Произведение с первой страницей отзывов для `?expand=reviews`."""
+    reviews = serializers.SerializerMethodField()
+
+    def get_reviews(self, title):
+        return self.context['view'].get_embedded_reviews(title)
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Место в списке лучших: взвешенный рейтинг и произведение."""
+    title = TitleSerializerReadOnly(read_only=True)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('score', 'title')
+
+
+class TitleRatingSerializer(serializers.ModelSerializer):
+    """Средняя оценка произведения и распределение оценок от 1 до 10."""
+    histogram = serializers.SerializerMethodField()
 
     class Meta:
-        fields = '__all__'
         model = Title
+        fields = ('id', 'rating', 'review_count', 'histogram')
+
+    def get_histogram(self, title):
+        return get_histogram(title)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -121,20 +159,15 @@ class ReviewSerializer(serializers.ModelSerializer):
     def get_author(self, obj):
         return obj.author.username
 
-    def validate(self, data):
-        if self.context['request'].method == 'POST':
-            if Review.objects.filter(
-                    title_id=self.context['view'].kwargs.get('title_id', None),
-                    author=self.context['request'].user
-            ).exists():
-                raise serializers.ValidationError(
-                    'Можно добавить только 1 отзыв на произведение!'
-                )
-        return data
-
     class Meta:
         model = Review
-        fields = '__all__'
+        # updated_at — служебное поле валидаторов и выгрузки.
+        exclude = ('updated_at',)
+
+
+class ReviewSlimSerializer(ReviewSerializer):
+    """Облегченный сериализатор отзыва: произведение передается id."""
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -150,4 +183,19 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = '__all__'
+        exclude = ('updated_at',)
+
+
+class CommentSlimSerializer(CommentSerializer):
+    """Облегченный сериализатор комментария: отзыв передается id."""
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class ChangeEventSerializer(serializers.ModelSerializer):
+    """Событие журнала изменений; seq — номер для параметра after."""
+    seq = serializers.IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = ChangeEvent
+        fields = ('seq', 'model', 'object_id', 'action', 'path',
+                  'created_at')
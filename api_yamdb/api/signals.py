@@ -0,0 +1,216 @@
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import transaction
+from django.dispatch import receiver
+
+from api import membership, snapshots
+from api.authentication import user_cache_tag
+from api.cache import response_cache
+from api.changes import record_change, record_title_updates
+from api.membership import ID_BITMAPS, review_ids, title_ids
+from reviews import cascade
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    User,
+)
+
+
+@receiver(post_migrate)
+def invalidate_cache_on_migrate(sender, **kwargs):
+    """После migrate и flush кэш ответов и карты id недействительны."""
+    response_cache.invalidate_all()
+    snapshots.clear_snapshots()
+    title_ids.reset()
+    review_ids.reset()
+
+
+@receiver(request_started)
+def begin_request(sender, **kwargs):
+    snapshots.begin_request()
+    membership.begin_request()
+
+
+@receiver(request_finished)
+def rebuild_snapshots_after_request(sender, **kwargs):
+    """Снимки каталога и истекшие карты id перестраиваются после отправки
+    ответа."""
+    snapshots.finish_request()
+    membership.finish_request()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit(f'title:{instance.pk}', 'titles')
+    snapshots.schedule_rebuild('titles')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_rating(sender, instance, **kwargs):
+    """Рейтинг и число отзывов произведения меняют и его место в списках
+    с `?ordering=rating|review_count`."""
+    if cascade.is_deleting(Title, instance.title_id):
+        return
+    response_cache.invalidate_on_commit(
+        f'title:{instance.title_id}', 'titles:rating'
+    )
+    snapshots.schedule_discard('titles')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_review(sender, instance, **kwargs):
+    """Отзыв с числом комментариев встроен в ответ ?expand= произведения."""
+    if cascade.is_deleting(Review, instance.review_id):
+        return
+    response_cache.invalidate_on_commit(f'review:{instance.review_id}')
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def invalidate_genre_title(sender, instance, **kwargs):
+    if cascade.is_deleting(Title, instance.title_id):
+        return
+    response_cache.invalidate_on_commit(f'title:{instance.title_id}', 'titles')
+    snapshots.schedule_rebuild('titles')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    snapshots.schedule_rebuild('titles')
+    if not reverse:
+        pk_set = {instance.pk}
+    elif pk_set is None:
+        response_cache.invalidate_on_commit('titles', f'genre:{instance.slug}')
+        return
+    response_cache.invalidate_on_commit(
+        'titles', *(f'title:{title_id}' for title_id in pk_set)
+    )
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Genre)
+def remember_saved_slug(sender, instance, **kwargs):
+    """Запоминает прежний slug, чтобы сбросить ответы со старым тегом."""
+    instance._saved_slug = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first() if instance.pk else None
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_saved_slug', None)} - {None}
+    response_cache.invalidate_on_commit(
+        'categories', *(f'category:{slug}' for slug in slugs)
+    )
+    snapshots.schedule_rebuild('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_saved_slug', None)} - {None}
+    response_cache.invalidate_on_commit(
+        'genres', *(f'genre:{slug}' for slug in slugs)
+    )
+    snapshots.schedule_rebuild('genres', 'titles')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Роль и флаги пользователя читаются из кэша аутентификации."""
+    response_cache.invalidate_on_commit(user_cache_tag(instance.pk))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def record_saved_change(sender, instance, created, **kwargs):
+    """Журнал изменений для синхронизации клиентов (см. api.changes)."""
+    record_change(instance, 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def record_deleted_change(sender, instance, **kwargs):
+    record_change(instance, 'delete')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def record_title_representation_change(sender, instance, **kwargs):
+    """Рейтинг и жанры входят в представление произведения.
+
+    Удаляемое произведение получает собственное событие удаления.
+    """
+    if cascade.is_deleting(Title, instance.title_id):
+        return
+    record_title_updates([instance.title_id])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def record_title_genres_change(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        record_title_updates([instance.pk])
+    elif pk_set is None:
+        record_title_updates(instance.titles.values_list('pk', flat=True))
+    else:
+        record_title_updates(pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def record_category_titles_change(sender, instance, created=False,
+                                  **kwargs):
+    """Название категории и обнуление ссылки при удалении."""
+    if not created:
+        record_title_updates(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+def record_genre_titles_change(sender, instance, created, **kwargs):
+    if not created:
+        record_title_updates(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+def add_existing_id(sender, instance, created, **kwargs):
+    if created:
+        ID_BITMAPS[sender].add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def discard_existing_id(sender, instance, **kwargs):
+    """Бит снимается после фиксации: при откате объект остается."""
+    bitmap, pk = ID_BITMAPS[sender], instance.pk
+    transaction.on_commit(lambda: bitmap.discard(pk))
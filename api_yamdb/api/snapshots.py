@@ -0,0 +1,262 @@
+"""Снимки первых страниц каталога на диске.
+
+Списки категорий, жанров и первые страницы произведений для анонимных
+запросов без дополнительных параметров отдаются готовыми файлами из
+API_SNAPSHOT_DIR — обычным и сжатым gzip — без обращения к ORM.
+
+Ссылки next/previous в ответе абсолютные, поэтому снимки хранятся
+отдельно для каждой пары схема-хост: <каталог>/<схема>-<хост>/<basename>/
+<страница>.json[.gz]. Снимки ведутся только для хостов из
+API_SNAPSHOT_HOSTS: каталог хоста появляется при первом запросе с него, а
+запросы с других хостов обслуживаются как обычно. После изменения
+каталога снимки известных хостов перестраиваются после фиксации
+транзакции — по завершении текущего HTTP-запроса, чтобы не задерживать
+его ответ. Отзывы меняют только рейтинг произведений, поэтому их запись
+лишь удаляет снимки произведений, а следующий анонимный запрос
+записывает их заново.
+
+Каждый список хранит снимки в каталоге своего поколения:
+<basename>/<поколение>/<страница>.json. Поколение — версия тега
+snapshot:<basename> в кэше ответов (api.cache), общая для процессов с
+общим бэкендом кэша, как и инвалидация ответов; изменение каталога меняет
+ее после фиксации транзакции.
+Запрос запоминает поколение до чтения базы и пишет снимок в его каталог,
+а читаются снимки только текущего поколения. Поэтому ответ, прочитанный
+до фиксации и записанный после нее, не будет отдан.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils.http import quote_etag
+
+from api.cache import response_cache
+
+SNAPSHOT_BASENAMES = ('categories', 'genres', 'titles')
+PAGE_QUERY_PARAM = 'page'
+
+_state = threading.local()
+
+
+def get_snapshot_dir():
+    return getattr(settings, 'API_SNAPSHOT_DIR', None)
+
+
+def get_snapshot_pages():
+    return getattr(settings, 'API_SNAPSHOT_PAGES', 3)
+
+
+def get_snapshot_hosts():
+    return getattr(settings, 'API_SNAPSHOT_HOSTS', ())
+
+
+def get_snapshot_page(request):
+    """Номер страницы, если ответ на запрос можно взять из снимка."""
+    if not get_snapshot_dir() or request.method != 'GET':
+        return None
+    if request.get_host() not in get_snapshot_hosts():
+        return None
+    if request.user.is_authenticated:
+        return None
+    if getattr(request.accepted_renderer, 'format', None) != 'json':
+        return None
+    params = request.query_params
+    if set(params) - {PAGE_QUERY_PARAM}:
+        return None
+    page = params.get(PAGE_QUERY_PARAM, '1')
+    if not page.isdigit() or not 1 <= int(page) <= get_snapshot_pages():
+        return None
+    return int(page)
+
+
+def generation_tag(basename):
+    return f'snapshot:{basename}'
+
+
+def get_generation(basename):
+    """Текущее поколение снимков списка."""
+    tag = generation_tag(basename)
+    return response_cache.get_tag_versions([tag])[tag]
+
+
+def host_directory(request):
+    """Каталог схемы и хоста; в имени хоста Django не допускает '_'."""
+    host = request.get_host().replace(':', '_')
+    return os.path.join(get_snapshot_dir(), f'{request.scheme}-{host}')
+
+
+def snapshot_path(request, basename, generation, page):
+    return os.path.join(
+        host_directory(request), basename, generation, f'{page}.json'
+    )
+
+
+def content_etag(content):
+    return quote_etag(hashlib.sha1(content).hexdigest())
+
+
+def read_snapshot(request, basename, generation, page, gzipped=False):
+    """Содержимое снимка или None, если его еще нет."""
+    path = snapshot_path(request, basename, generation, page)
+    try:
+        with open(path + '.gz' if gzipped else path, 'rb') as snapshot:
+            return snapshot.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_file(path, content):
+    temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporary, 'wb') as snapshot:
+        snapshot.write(content)
+    os.replace(temporary, path)
+
+
+def write_snapshot(request, basename, generation, page, content):
+    path = snapshot_path(request, basename, generation, page)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Сначала сжатая версия: по наличию несжатой судят о готовности.
+    write_file(path + '.gz', gzip.compress(content, mtime=0))
+    write_file(path, content)
+
+
+def render_pages(scheme, host, basename):
+    """Запрашивает первые страницы списка так, как их запросил бы клиент.
+
+    Вьюсет сам записывает снимок каждой успешно отданной страницы; после
+    первой неуспешной страницы остальные снимки удаляются.
+    """
+    path = reverse(f'api:{basename}-list')
+    view = resolve(path).func
+    factory = RequestFactory()
+    generation = get_generation(basename)
+    for page in range(1, get_snapshot_pages() + 1):
+        request = factory.get(
+            path,
+            {PAGE_QUERY_PARAM: page} if page > 1 else {},
+            HTTP_HOST=host,
+            HTTP_ACCEPT='application/json',
+            secure=scheme == 'https',
+        )
+        request.snapshot_rebuild = True
+        response = view(request)
+        if response.status_code != 200:
+            remove_pages(request, basename, generation, page)
+            return
+
+
+def remove_pages(request, basename, generation, first_page):
+    directory = os.path.dirname(
+        snapshot_path(request, basename, generation, first_page)
+    )
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        page = name.split('.', 1)[0]
+        if page.isdigit() and int(page) >= first_page:
+            os.remove(os.path.join(directory, name))
+
+
+def known_hosts():
+    """Пары (схема, хост) из API_SNAPSHOT_HOSTS, уже обращавшиеся к API."""
+    directory = get_snapshot_dir()
+    if not directory or not os.path.isdir(directory):
+        return []
+    hosts = []
+    for name in os.listdir(directory):
+        scheme, _, host = name.partition('-')
+        host = host.replace('_', ':')
+        if host in get_snapshot_hosts():
+            hosts.append((scheme, host))
+    return hosts
+
+
+def rebuild_snapshots(basenames=SNAPSHOT_BASENAMES):
+    """Перестраивает снимки всех известных хостов."""
+    for scheme, host in known_hosts():
+        for basename in basenames:
+            render_pages(scheme, host, basename)
+    remove_stale_generations(basenames)
+
+
+def remove_stale_generations(basenames):
+    """Удаляет каталоги прежних поколений снимков."""
+    directory = get_snapshot_dir()
+    for scheme, host in known_hosts():
+        host_dir = f'{scheme}-{host.replace(":", "_")}'
+        for basename in basenames:
+            generations = os.path.join(directory, host_dir, basename)
+            if not os.path.isdir(generations):
+                continue
+            current = get_generation(basename)
+            for name in os.listdir(generations):
+                if name != current:
+                    shutil.rmtree(
+                        os.path.join(generations, name), ignore_errors=True
+                    )
+
+
+def discard_snapshots(basenames):
+    """Отменяет снимки списков; их запишут следующие анонимные запросы."""
+    response_cache.invalidate(*map(generation_tag, basenames))
+    remove_stale_generations(basenames)
+
+
+def clear_snapshots():
+    directory = get_snapshot_dir()
+    if directory and os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+
+def schedule_rebuild(*basenames):
+    """Перестроить снимки после фиксации текущей транзакции.
+
+    Несколько изменений в одном запросе или транзакции приводят к одной
+    перестройке: списки накапливаются, а внутри HTTP-запроса перестройка
+    откладывается до его завершения.
+    """
+    if not get_snapshot_dir():
+        return
+
+    def mark_pending():
+        # Поколение меняется сразу: до перестройки снимки не отдаются.
+        response_cache.invalidate(*map(generation_tag, basenames))
+        pending = getattr(_state, 'pending', set())
+        pending.update(basenames)
+        _state.pending = pending
+        if not getattr(_state, 'in_request', False):
+            rebuild_pending()
+
+    transaction.on_commit(mark_pending)
+
+
+def schedule_discard(*basenames):
+    """Удалить снимки списков после фиксации текущей транзакции."""
+    if not get_snapshot_dir():
+        return
+    transaction.on_commit(lambda: discard_snapshots(basenames))
+
+
+def rebuild_pending():
+    pending = getattr(_state, 'pending', None)
+    _state.pending = set()
+    if pending:
+        rebuild_snapshots(
+            [basename for basename in SNAPSHOT_BASENAMES
+             if basename in pending]
+        )
+
+
+def begin_request():
+    _state.in_request = True
+
+
+def finish_request():
+    _state.in_request = False
+    rebuild_pending()
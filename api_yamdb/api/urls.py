@@ -10,6 +10,8 @@ from .views import (
     GenreViewSet,
     CustomCommentViewSet,
     CustomReviewViewSet,
+    ExportViewSet,
+    ChangeViewSet,
 )
 
 
@@ -24,6 +26,8 @@ router.register(
 router.register(
     'genres', GenreViewSet, basename='genres')
 router.register('users', UserViewSet, basename='users')
+router.register('export', ExportViewSet, basename='export')
+router.register('changes', ChangeViewSet, basename='changes')
 router.register(
     r'titles/(?P<title_id>\d+)/reviews',
     CustomReviewViewSet,
@@ -1,20 +1,35 @@
-from django.core.mail import send_mail
-from django.db.models import Avg
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.contrib.auth.tokens import default_token_generator
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, mixins, status
+from rest_framework import generics, viewsets, mixins, status
 from rest_framework.permissions import (
     IsAuthenticated,
     AllowAny,
 )
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
+from rest_framework.settings import api_settings
 from rest_framework.filters import SearchFilter
+from rest_framework.utils.urls import replace_query_param
 
 from api_yamdb.settings import EMAIL_API
+from reviews import leaderboards
+from reviews.mail import enqueue_email
+from reviews.ratings import HISTOGRAM_FIELDS
 from reviews.models import (
+    ChangeEvent,
+    LeaderboardEntry,
     User,
     Review,
     Title,
@@ -22,14 +37,20 @@ from reviews.models import (
     Genre,
 )
 from api.serializers import (
+    ChangeEventSerializer,
     SignUpSerializer,
     TokenSerializer,
     UserSerializer,
     TitleSerializer,
+    TitleRatingSerializer,
     CategorySerializer,
     GenreSerializer,
     CommentSerializer,
+    CommentSlimSerializer,
+    LeaderboardEntrySerializer,
+    TitleExpandedSerializer,
     ReviewSerializer,
+    ReviewSlimSerializer,
     TitleSerializerReadOnly
 )
 from api.permissions import (
@@ -38,8 +59,38 @@ from api.permissions import (
     IsReadOnly,
     IsAdminModeratorOwnerOrReadOnly,
 )
-from api.filters import TitleFilter
+from api.cache import title_cache_tags
+from api.export import EXPORTS
+from api.filters import (
+    TitleFilter,
+    TitleOrderingFilter,
+    TitleSearchFilter,
+)
+from api.membership import review_ids, title_ids
 from api.mixins import CreateDestroyViewSet, TitleViewSet, ReviewCommentViewSet
+from api.pagination import ChangeFeedPagination
+from api.renderers import CSVRenderer, NDJSONRenderer
+
+# Наибольшее значение первичного ключа, которое принимает база.
+MAX_ID = 2 ** 63 - 1
+
+
+def violates_constraint(error, model, name):
+    """Нарушено ли ограничение уникальности `name` модели.
+
+    PostgreSQL и MySQL называют ограничение в сообщении, SQLite — только
+    перечисляет его столбцы: «UNIQUE constraint failed: t.a, t.b».
+    """
+    constraint = next(
+        item for item in model._meta.constraints if item.name == name
+    )
+    table = model._meta.db_table
+    columns = ', '.join(
+        f'{table}.{model._meta.get_field(field).column}'
+        for field in constraint.fields
+    )
+    message = str(error)
+    return name in message or message.endswith(columns)
 
 
 class SignUpViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -47,6 +98,8 @@ class SignUpViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = SignUpSerializer
     permission_classes = (AllowAny,)
+    # Включая немедленную отправку при EMAIL_QUEUE_EAGER с захватом пачки.
+    query_budget = 12
 
     def create(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -59,12 +112,11 @@ class SignUpViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
             )
         user, _ = User.objects.get_or_create(**serializer.data)
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_email(
             subject='Код подтверждения',
             message=f'ваш "confirmation_code": {confirmation_code}',
             from_email=EMAIL_API,
             recipient_list=(user.email,),
-            fail_silently=False,
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -74,6 +126,7 @@ class TokenViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = TokenSerializer
     permission_classes = (AllowAny,)
+    query_budget = 1
 
     def create(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -100,6 +153,12 @@ class UserViewSet(
     lookup_field = 'username'
     filter_backends = (SearchFilter,)
     search_fields = ('username',)
+    query_budget = {
+        'list': 3,
+        'create': 4,
+        'get_user_by_username': 9,
+        'get_data_about_me': 3,
+    }
 
     @action(
         detail=False,
@@ -149,6 +208,7 @@ class CategoryViewSet(CreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsAdmin | IsReadOnly]
+    cache_tags = ('categories',)
 
 
 class GenreViewSet(CreateDestroyViewSet):
@@ -156,56 +216,405 @@ class GenreViewSet(CreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [IsAdmin | IsReadOnly]
+    cache_tags = ('genres',)
 
 
 class TitleViewSet(TitleViewSet):
     """Тайтлвью сет фильтрация, создание и обновление."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
     serializer_class = TitleSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [
+        DjangoFilterBackend, TitleSearchFilter, TitleOrderingFilter
+    ]
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'review_count', 'year', 'name')
+    rating_ordering_fields = ('rating', 'review_count')
     permission_classes = [IsAdmin | IsReadOnly]
+    query_budget = {
+        'list': 5,
+        'retrieve': 4,
+        'create': 14,
+        'update': 13,
+        'partial_update': 13,
+        'destroy': 18,
+        'top': 4,
+        'rating': 2,
+        # Плюс первая загрузка карты id процесса (api.membership).
+        'batch': 3,
+    }
+    batch_query_param = 'ids'
+    expand_query_param = 'expand'
+    expand_choices = ('reviews', 'comment_counts')
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return TitleSerializer
+        if self.action == 'retrieve' and self.get_expand():
+            return TitleExpandedSerializer
         return TitleSerializerReadOnly
 
+    def get_expand(self):
+        """Встраиваемые в произведение данные из `?expand=`."""
+        values = self.request.query_params.get(self.expand_query_param, '')
+        expand = {value.strip() for value in values.split(',')} - {''}
+        unknown = expand - set(self.expand_choices)
+        if unknown:
+            raise ValidationError({
+                self.expand_query_param: 'Допустимые значения: {}.'.format(
+                    ', '.join(self.expand_choices)
+                )
+            })
+        if expand and 'reviews' not in expand:
+            raise ValidationError({
+                self.expand_query_param: 'comment_counts встраивается '
+                                         'только вместе с reviews.'
+            })
+        return expand
+
+    def get_embedded_reviews(self, title):
+        return CustomReviewViewSet.get_first_page(
+            self.request, title, 'comment_counts' in self.get_expand()
+        )
+
+    def get_leaderboard_scope(self):
+        """Список лучших по `?genre=` или `?category=`, иначе общий."""
+        params = self.request.query_params
+        genre, category = params.get('genre'), params.get('category')
+        if genre and category:
+            raise ValidationError('Укажите либо жанр, либо категорию.')
+        if genre:
+            genre = get_object_or_404(Genre, slug=genre)
+            return LeaderboardEntry.Scope.GENRE, genre.pk
+        if category:
+            category = get_object_or_404(Category, slug=category)
+            return LeaderboardEntry.Scope.CATEGORY, category.pk
+        return LeaderboardEntry.Scope.ALL, 0
+
+    @action(detail=True)
+    def rating(self, request, pk=None):
+        """Распределение оценок произведения без чтения отзывов."""
+        # Нечисловой pk — 404, а не ValueError, как в get_object().
+        title = generics.get_object_or_404(
+            Title.objects.only('rating', 'review_count', *HISTOGRAM_FIELDS),
+            pk=pk,
+        )
+        return Response(TitleRatingSerializer(title).data)
+
+    def get_batch_ids(self):
+        """id из `?ids=1,2,3` без повторов, в порядке запроса."""
+        values = self.request.query_params.get(self.batch_query_param, '')
+        values = [value.strip() for value in values.split(',')]
+        if not all(
+            value.isascii() and value.isdigit() and 0 < int(value) <= MAX_ID
+            for value in values
+        ):
+            raise ValidationError({
+                self.batch_query_param: 'Укажите id произведений через '
+                                        'запятую.'
+            })
+        ids = list(dict.fromkeys(int(value) for value in values))
+        limit = settings.API_TITLE_BATCH_SIZE
+        if len(ids) > limit:
+            raise ValidationError({
+                self.batch_query_param: f'Не больше {limit} id за запрос.'
+            })
+        return ids
+
+    @action(detail=False)
+    def batch(self, request):
+        """Несколько произведений одним ответом в порядке `?ids=`.
+
+        Произведения загружаются теми же двумя запросами, что и страница
+        списка; id, отсутствующие в каталоге, перечислены в `missing`.
+        """
+        ids = self.get_batch_ids()
+        candidates = [pk for pk in ids if not title_ids.known_deleted(pk)]
+        titles = (
+            self.get_queryset().in_bulk(candidates) if candidates else {}
+        )
+        serializer = self.get_serializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in titles],
+        })
+
+    @action(detail=False)
+    def top(self, request):
+        """Лучшие произведения по взвешенному рейтингу."""
+        entries = leaderboards.get_leaderboard(*self.get_leaderboard_scope())
+        return Response(LeaderboardEntrySerializer(entries, many=True).data)
+
+    def is_rating_ordered(self):
+        """Список отсортирован `?ordering=` по рейтингу или числу
+        отзывов."""
+        ordering = TitleOrderingFilter().get_ordering(
+            self.request, self.queryset, self
+        ) or ()
+        return any(
+            field.lstrip('-') in self.rating_ordering_fields
+            for field in ordering
+        )
+
+    def get_request_cache_tags(self):
+        if self.action != 'list':
+            return {f'title:{self.kwargs[self.lookup_field]}'}
+        tags = {'titles'}
+        if self.is_rating_ordered():
+            # Оценка любого произведения может переставить страницу.
+            tags.add('titles:rating')
+        return tags
+
+    def get_response_cache_tags(self, data):
+        """Теги произведений, их категорий и жанров из ответа."""
+        if self.action != 'list':
+            tags = title_cache_tags(data)
+            tags.update(
+                f'review:{review["id"]}'
+                for review in data.get('reviews', {}).get('results', ())
+            )
+            return tags
+        tags = self.get_request_cache_tags()
+        for title in data['results']:
+            tags.update(title_cache_tags(title))
+        return tags
+
 
 class CustomReviewViewSet(ReviewCommentViewSet):
     """Вьюсет работы с отзывами."""
     serializer_class = ReviewSerializer
+    slim_serializer_class = ReviewSlimSerializer
     permission_classes = (IsAdminModeratorOwnerOrReadOnly,)
+    last_modified_fields = ('updated_at', 'title__updated_at')
+    duplicate_message = 'Можно добавить только 1 отзыв на произведение!'
+    title = None
+    embedded = False
+    # С первой загрузкой карты id произведений (api.membership).
+    query_budget = {
+        'list': 5,
+        'retrieve': 5,
+        'create': 14,
+        'update': 13,
+        'partial_update': 13,
+        'destroy': 15,
+    }
 
     def get_title(self):
-        """Метод получения произведения, для которого пишется отзыв."""
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        """Произведение из URL, один запрос на весь HTTP-запрос.
+
+        Заведомо несуществующий id отклоняется без запроса (api.membership).
+
+        Категория загружается сразу: она нужна вложенному представлению
+        произведения в ответе на создание отзыва.
+        """
+        if self.title is None:
+            if not title_ids.might_exist(self.kwargs['title_id']):
+                raise Http404
+            self.title = get_object_or_404(
+                Title.objects.select_related('category'),
+                id=self.kwargs.get('title_id'),
+            )
+        return self.title
+
+    @classmethod
+    def get_first_page(cls, request, title, comment_counts=False):
+        """Первая страница отзывов для `?expand=reviews` произведения.
+
+        Произведение уже загружено вызывающим вьюсетом, общее число
+        отзывов берется из review_count, а число комментариев считается
+        в запросе страницы — встраивание стоит одного запроса.
+        """
+        view = cls(
+            request=request, format_kwarg=None, action='list',
+            kwargs={'title_id': title.pk}, embedded=True, title=title,
+        )
+        queryset = view.get_queryset()
+        if comment_counts:
+            queryset = queryset.annotate(comment_count=Count('comments'))
+        page_size = view.paginator.page_size
+        reviews = list(queryset[:page_size + 1])
+        results = view.get_serializer(reviews[:page_size], many=True).data
+        if comment_counts:
+            for data, review in zip(results, reviews):
+                data['comment_count'] = review.comment_count
+        next_link = None
+        if len(reviews) > page_size:
+            next_link = replace_query_param(
+                request.build_absolute_uri(
+                    reverse('api:reviews-list', args=(title.pk,))
+                ),
+                view.paginator.page_query_param, 2,
+            )
+        return {
+            'count': title.review_count,
+            'next': next_link,
+            'results': results,
+        }
+
+    def is_slim(self):
+        """Отзывы, встроенные в произведение, передают только его id."""
+        return self.embedded or super().is_slim()
+
+    def get_list_state(self, request):
+        """Запись отзыва меняет review_count или updated_at произведения."""
+        title = self.get_title()
+        return title.review_count, title.updated_at
 
     def get_queryset(self):
         """Метод получения списка отзывов."""
-        return self.get_title().reviews.all()
+        queryset = self.get_title().reviews.select_related('author')
+        if self.is_slim():
+            return queryset
+        return queryset.prefetch_related('title__category', 'title__genre')
 
     def perform_create(self, serializer):
-        """Метод создания отзыва, с текущим пользователем в поел author."""
-        serializer.save(title=self.get_title(), author=self.request.user)
+        """Создание отзыва текущего пользователя.
+
+        Повторный отзыв отклоняет ограничение uniq_review, без отдельной
+        проверки перед вставкой.
+        """
+        title = self.get_title()
+        try:
+            with transaction.atomic():
+                serializer.save(title=title, author=self.request.user)
+        except IntegrityError as error:
+            # Ошибки обработчиков сигналов в той же транзакции — не повтор.
+            if not violates_constraint(error, Review, 'uniq_review'):
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.duplicate_message]}
+            )
 
 
 class CustomCommentViewSet(ReviewCommentViewSet):
     """Вьюсет работы с комментариями."""
     serializer_class = CommentSerializer
+    slim_serializer_class = CommentSlimSerializer
     permission_classes = (IsAdminModeratorOwnerOrReadOnly,)
+    last_modified_fields = (
+        'updated_at', 'review__updated_at', 'review__title__updated_at'
+    )
+    review = None
+    # С первой загрузкой карт id произведений и отзывов (api.membership).
+    query_budget = {
+        'list': 6,
+        'retrieve': 6,
+        'create': 8,
+        'update': 8,
+        'partial_update': 8,
+        'destroy': 9,
+    }
 
     def get_review(self):
-        """Метод получения отзыва, к которому пишется комментарий."""
-        return get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title=self.kwargs.get('title_id')
+        """Отзыв из URL, один запрос на весь HTTP-запрос.
+
+        Заведомо несуществующие id отклоняются без запроса (api.membership).
+
+        Отзыв, не принадлежащий произведению из URL, не найдется тем же
+        запросом; автор и произведение нужны представлению отзыва в ответе
+        на создание комментария.
+        """
+        if self.review is None:
+            if not (
+                review_ids.might_exist(self.kwargs['review_id'])
+                and title_ids.might_exist(self.kwargs['title_id'])
+            ):
+                raise Http404
+            self.review = get_object_or_404(
+                Review.objects.select_related('author', 'title__category'),
+                id=self.kwargs.get('review_id'),
+                title=self.kwargs.get('title_id'),
+            )
+        return self.review
+
+    def get_list_state(self, request):
+        """Запись комментария меняет updated_at произведения отзыва."""
+        review = self.get_review()
+        return (
+            review.updated_at.isoformat(),
+            max(review.updated_at, review.title.updated_at),
         )
 
     def get_queryset(self):
         """Метод получения списка комментариев."""
-        return self.get_review().comments.all()
+        queryset = self.get_review().comments.select_related('author')
+        if self.is_slim():
+            return queryset
+        return queryset.prefetch_related(
+            'review__author', 'review__title__category', 'review__title__genre'
+        )
 
     def perform_create(self, serializer):
         serializer.save(review=self.get_review(), author=self.request.user)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Потоковая выгрузка каталога, отзывов и комментариев.
+
+    Формат выбирается заголовком Accept или `?format=ndjson|csv`,
+    `?since=<ISO 8601>` оставляет объекты, измененные после этой даты.
+    """
+    permission_classes = (IsAdminOrSuperUserDjango,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    query_budget = 2
+
+    def get_since(self):
+        """Момент из `?since=`: дата и время или дата (полночь); без
+        часового пояса — в текущем поясе."""
+        since = self.request.query_params.get('since')
+        if since is None:
+            return None
+        try:
+            parsed = parse_datetime(since)
+            if parsed is None:
+                date = parse_date(since)
+                parsed = date and datetime.combine(date, time.min)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError(
+                {'since': 'Ожидается дата или дата и время в формате '
+                          'ISO 8601.'}
+            )
+        if settings.USE_TZ and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def export(self, name):
+        rows, fields = EXPORTS[name]
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(
+                rows(self.get_since(), settings.API_EXPORT_CHUNK_SIZE),
+                fields,
+            ),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{renderer.format}"'
+        )
+        return response
+
+    @action(detail=False)
+    def titles(self, request):
+        return self.export('titles')
+
+    @action(detail=False)
+    def reviews(self, request):
+        return self.export('reviews')
+
+    @action(detail=False)
+    def comments(self, request):
+        return self.export('comments')
+
+
+class ChangeViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Журнал изменений каталога: `/changes/?after=<seq>`."""
+    queryset = ChangeEvent.objects.all()
+    serializer_class = ChangeEventSerializer
+    pagination_class = ChangeFeedPagination
+    permission_classes = (AllowAny,)
+    query_budget = {'list': 2}
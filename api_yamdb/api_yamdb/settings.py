@@ -34,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -68,6 +69,54 @@ DATABASES = {
 }
 
 
+# Cache
+# Для нескольких процессов подойдет файловый бэкенд:
+# 'django.core.cache.backends.filebased.FileBasedCache'.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = 60 * 5
+
+# Сколько секунд пользователь из JWT-токена хранится в кэше ответов API.
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Бюджет SQL-запросов объявляется на вьюсетах (query_budget). В строгом
+# режиме превышение прерывает запрос, иначе пишется в журнал api.queries.
+QUERY_BUDGET_STRICT = False
+QUERY_BUDGET_DUPLICATE_LIMIT = 3
+
+# Каталог снимков списков категорий, жанров и первых API_SNAPSHOT_PAGES
+# страниц произведений для анонимных запросов; None отключает снимки.
+API_SNAPSHOT_DIR = None
+API_SNAPSHOT_PAGES = 3
+# Хосты (как в заголовке Host), для которых ведутся снимки: ссылки в
+# ответах абсолютные, и у каждого хоста свой набор файлов.
+API_SNAPSHOT_HOSTS = []
+
+# Число строк, читаемых одним запросом при потоковой выгрузке /export/.
+API_EXPORT_CHUNK_SIZE = 1000
+
+# Как часто, в секундах, перечитываются битовые карты id произведений и
+# отзывов, отсекающие 404 вложенных адресов без запроса к БД; None отключает.
+API_ID_BITMAP_TTL = 300
+
+# Наибольшее число произведений в одном запросе /titles/batch/?ids=.
+API_TITLE_BATCH_SIZE = 100
+
+# Списки лучших /titles/top/: длина списка и байесовское среднее, которое
+# стягивает рейтинг к LEADERBOARD_PRIOR_MEAN с весом LEADERBOARD_PRIOR_WEIGHT
+# отзывов. После изменения параметров нужна команда rebuild_ratings.
+LEADERBOARD_SIZE = 20
+LEADERBOARD_PRIOR_MEAN = 5.5
+LEADERBOARD_PRIOR_WEIGHT = 5
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,7 +162,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -131,3 +180,12 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 EMAIL_API = 'zbls@pzdc.ru'
+
+# Очередь писем: разбирается командой send_emails. При EMAIL_QUEUE_EAGER
+# письма отправляются сразу после фиксации транзакции запроса.
+EMAIL_QUEUE_EAGER = False
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60
+# Сколько секунд захваченная отправителем пачка недоступна другим.
+EMAIL_QUEUE_LEASE = 300
@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import User, Title, Category, Genre, Comment, Review
+from .models import (
+    User, Title, Category, Genre, Comment, Review, OutgoingEmail,
+    LeaderboardEntry,
+)
 
 admin.site.register(User)
 admin.site.register(Title)
@@ -8,3 +11,5 @@ admin.site.register(Category)
 admin.site.register(Genre)
 admin.site.register(Comment)
 admin.site.register(Review)
+admin.site.register(OutgoingEmail)
+admin.site.register(LeaderboardEntry)
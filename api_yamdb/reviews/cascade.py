@@ -0,0 +1,107 @@
+"""Каскадное удаление произведений, отзывов и пользователей.
+
+Удаляя объект, Django отправляет post_delete каждому зависимому отзыву,
+комментарию и связи с жанром. Поддерживать рейтинг, списки лучших и
+updated_at произведения, которое удаляется той же операцией, не нужно, а
+события журнала и отметки изменений зависимых объектов достаточно
+записать один раз после удаления корневого объекта.
+
+pre_delete родителя отмечает его удаляемым, обработчики зависимых
+объектов проверяют отметку is_deleting() и откладывают работу через
+defer(). Отложенное выполняется функциями, зарегистрированными
+register_flush(), когда снята последняя отметка, то есть после post_delete
+корневого объекта. Отметка действует, пока не завершилась транзакция
+удаления: при откате она и отложенная работа отбрасываются.
+"""
+import threading
+
+from django.db import connections, transaction
+
+_state = threading.local()
+_flushers = {}
+
+
+def get_state():
+    if not hasattr(_state, 'marks'):
+        _state.marks = {}
+        _state.pending = {}
+    return _state
+
+
+def is_live(mark):
+    """Отметка действует, пока ее транзакция не зафиксирована и не
+    откачена: on_commit-функция отметки еще ждет фиксации."""
+    using, callback, _ = mark
+    return any(
+        func is callback for _, func in connections[using].run_on_commit
+    )
+
+
+def drop_stale():
+    """Убирает отметки завершенных транзакций; без отметок отложенная
+    работа откаченного каскада отбрасывается."""
+    state = get_state()
+    for key, mark in list(state.marks.items()):
+        if not is_live(mark):
+            del state.marks[key]
+    if not state.marks:
+        state.pending = {}
+
+
+def mark_deleting(instance, using):
+    state = get_state()
+    drop_stale()
+    key = (type(instance), instance.pk)
+
+    def unmark():
+        state.marks.pop(key, None)
+
+    state.marks[key] = (using, unmark, instance)
+    # Вне транзакции on_commit вызывает функцию сразу и снимает отметку.
+    transaction.on_commit(unmark, using=using)
+
+
+def unmark_deleting(instance):
+    """Снимает отметку; после последней выполняется отложенная работа."""
+    state = get_state()
+    state.marks.pop((type(instance), instance.pk), None)
+    pending, state.pending = state.pending, {}
+    drop_stale()
+    if state.marks:
+        state.pending = pending
+        return
+    for name, values in pending.items():
+        _flushers[name](values)
+
+
+def get_deleting(model, pk):
+    """Удаляемый в текущем каскаде объект или None."""
+    mark = get_state().marks.get((model, pk))
+    if mark is None:
+        return None
+    if is_live(mark):
+        return mark[2]
+    drop_stale()
+    return None
+
+
+def is_deleting(model, pk):
+    return get_deleting(model, pk) is not None
+
+
+def defer(name, value):
+    """Откладывает значение до конца каскада; вне каскада — False."""
+    state = get_state()
+    drop_stale()
+    if not state.marks:
+        return False
+    state.pending.setdefault(name, []).append(value)
+    return True
+
+
+def register_flush(name):
+    """Функция, выполняющая отложенную работу `name` списком значений."""
+    def decorator(func):
+        _flushers[name] = func
+        return func
+    return decorator
@@ -0,0 +1,221 @@
+"""Списки лучших произведений всего каталога, категорий и жанров.
+
+Место в списке определяет взвешенный рейтинг Title.score: байесовское
+среднее, которое стягивает оценку произведения с немногими отзывами к
+априорному среднему LEADERBOARD_PRIOR_MEAN с весом LEADERBOARD_PRIOR_WEIGHT
+отзывов. Каждый список хранит LEADERBOARD_SIZE лучших произведений в
+LeaderboardEntry, поэтому чтение списка — одна выборка из N строк.
+
+Списки обновляются по одному произведению. Произведения вне полного
+списка не лучше его последнего места, поэтому перестраивать список нужно,
+только если произведение из списка опустилось ниже последнего места или
+покинуло список; иначе достаточно добавить, обновить или вытеснить одну
+запись. Порядок — по убыванию (score, id).
+"""
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from reviews.models import Category, Genre, LeaderboardEntry, Title
+
+Scope = LeaderboardEntry.Scope
+
+
+def get_leaderboard_size():
+    return getattr(settings, 'LEADERBOARD_SIZE', 20)
+
+
+def board_titles(scope, scope_id):
+    """Произведения с оценкой, входящие в список."""
+    titles = Title.objects.filter(score__isnull=False)
+    if scope == Scope.CATEGORY:
+        return titles.filter(category_id=scope_id)
+    if scope == Scope.GENRE:
+        return titles.filter(genre__id=scope_id)
+    return titles
+
+
+def get_leaderboard(scope, scope_id=0):
+    """Места списка по порядку вместе с произведениями для вывода."""
+    return LeaderboardEntry.objects.filter(
+        scope=scope, scope_id=scope_id
+    ).select_related('title__category').prefetch_related(
+        'title__genre'
+    ).order_by('-score', '-title_id')[:get_leaderboard_size()]
+
+
+def top_titles(scope, scope_id):
+    """Лучшие произведения списка по индексу взвешенного рейтинга."""
+    return list(board_titles(scope, scope_id).order_by(
+        '-score', '-id'
+    ).values_list('id', 'score')[:get_leaderboard_size()])
+
+
+def rebuild_leaderboards():
+    """Перестраивает все списки, например после массовой загрузки."""
+    boards = [(Scope.ALL, 0)]
+    boards.extend(
+        (Scope.CATEGORY, category_id)
+        for category_id in Category.objects.values_list('id', flat=True)
+    )
+    boards.extend(
+        (Scope.GENRE, genre_id)
+        for genre_id in Genre.objects.values_list('id', flat=True)
+    )
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(
+                scope=scope, scope_id=scope_id, title_id=title_id,
+                score=score,
+            )
+            for scope, scope_id in boards
+            for title_id, score in top_titles(scope, scope_id)
+        )
+
+
+def load_entries(condition):
+    entries = defaultdict(list)
+    for entry in LeaderboardEntry.objects.filter(condition):
+        entries[entry.scope, entry.scope_id].append(entry)
+    return entries
+
+
+def apply_changes(entries, targets):
+    """Приводит записи списков к целевым парам (произведение, оценка)
+    тремя пакетными запросами на все списки."""
+    created, deleted, updated = [], [], []
+    for board, target in targets.items():
+        scores = dict(target)
+        for entry in entries[board]:
+            score = scores.pop(entry.title_id, None)
+            if score is None:
+                deleted.append(entry.pk)
+            elif score != entry.score:
+                entry.score = score
+                updated.append(entry)
+        created.extend(
+            LeaderboardEntry(
+                scope=board[0], scope_id=board[1], title_id=title_id,
+                score=score,
+            )
+            for title_id, score in scores.items()
+        )
+    if deleted:
+        LeaderboardEntry.objects.filter(pk__in=deleted).delete()
+    if updated:
+        LeaderboardEntry.objects.bulk_update(updated, ('score',))
+    if created:
+        LeaderboardEntry.objects.bulk_create(created)
+
+
+def refill(*boards):
+    """Строит списки заново, например после очистки жанра."""
+    if not boards:
+        return
+    with transaction.atomic(savepoint=False):
+        entries = load_entries(reduce(operator.or_, (
+            Q(scope=scope, scope_id=scope_id) for scope, scope_id in boards
+        )))
+        apply_changes(entries, {board: top_titles(*board) for board in boards})
+
+
+def title_boards(*title_ids):
+    """Оценки произведений и списки, в которые каждое должно входить:
+    {id: (оценка, списки)}; у произведения без оценки списков нет."""
+    result = {title_id: (None, set()) for title_id in title_ids}
+    for score, category_id, genre_id, title_id in Title.objects.filter(
+        pk__in=title_ids, score__isnull=False
+    ).values_list('score', 'category_id', 'genre', 'pk'):
+        boards = result[title_id][1]
+        boards.add((Scope.ALL, 0))
+        if category_id is not None:
+            boards.add((Scope.CATEGORY, category_id))
+        if genre_id is not None:
+            boards.add((Scope.GENRE, genre_id))
+        result[title_id] = score, boards
+    return result
+
+
+def sync_title(title_id):
+    """Приводит списки в соответствие с оценкой, категорией и жанрами
+    произведения; удаленное произведение покидает все списки."""
+    sync_titles([title_id])
+
+
+def sync_titles(title_ids):
+    """sync_title для нескольких произведений с общей загрузкой списков,
+    например после удаления всех отзывов пользователя."""
+    title_ids = list(dict.fromkeys(title_ids))
+    if not title_ids:
+        return
+    scored = title_boards(*title_ids)
+    wanted = set().union(*(boards for _, boards in scored.values()))
+    # Списки, где произведения должны быть или уже есть, — целиком.
+    condition = reduce(operator.or_, (
+        Q(scope=scope, scope_id=scope_id) for scope, scope_id in wanted
+    ), Q(Exists(LeaderboardEntry.objects.filter(
+        scope=OuterRef('scope'), scope_id=OuterRef('scope_id'),
+        title_id__in=title_ids,
+    ))))
+    with transaction.atomic(savepoint=False):
+        entries = load_entries(condition)
+        rows = {
+            board: [(entry.title_id, entry.score) for entry in board_entries]
+            for board, board_entries in entries.items()
+        }
+        changed = set()
+        for title_id in title_ids:
+            score, boards = scored[title_id]
+            present = {
+                board for board, board_rows in rows.items()
+                if any(row[0] == title_id for row in board_rows)
+            }
+            for board in boards | present:
+                target = get_target(
+                    board, rows.get(board, []), title_id,
+                    score if board in boards else None,
+                )
+                if target is not None:
+                    rows[board] = target
+                    changed.add(board)
+        apply_changes(entries, {board: rows[board] for board in changed})
+
+
+def get_target(board, rows, title_id, score):
+    """Новое содержимое списка — пар (произведение, оценка) — или None,
+    если список не меняется.
+
+    score=None — произведение покидает список.
+    """
+    rows = list(rows)
+    current = next((row for row in rows if row[0] == title_id), None)
+    full = len(rows) >= get_leaderboard_size()
+    if score is None:
+        if current is None:
+            return None
+        if full:
+            # Освободившееся место может занять произведение вне списка.
+            return top_titles(*board)
+        rows.remove(current)
+        return rows
+    if current == (title_id, score):
+        return None
+    last = min(rows, key=lambda row: (row[1], row[0]), default=None)
+    if current is not None:
+        if full and (score, title_id) < (last[1], last[0]):
+            return top_titles(*board)
+        rows.remove(current)
+    elif full:
+        if (score, title_id) < (last[1], last[0]):
+            return None
+        rows.remove(last)
+    return rows + [(title_id, score)]
+
+
+def remove_board(scope, scope_id):
+    LeaderboardEntry.objects.filter(scope=scope, scope_id=scope_id).delete()
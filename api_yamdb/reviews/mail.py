@@ -0,0 +1,131 @@
+"""Очередь исходящих писем.
+
+Письма сохраняются в таблицу OutgoingEmail и отправляются отдельным
+процессом (команда send_emails) пачками через одно открытое соединение
+с почтовым бэкендом. Неудачная отправка откладывается с экспоненциально
+растущей паузой, пока не будет исчерпано число попыток.
+
+Пачку писем отправитель сначала захватывает одним условным UPDATE,
+ставя свою метку и срок захвата EMAIL_QUEUE_LEASE: несколько процессов
+send_emails или немедленная отправка при EMAIL_QUEUE_EAGER рядом с
+процессом не отправят одно письмо дважды. Письма отправителя, упавшего
+посреди пачки, снова берутся в работу после истечения срока.
+"""
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+def get_queue_setting(name, default):
+    return getattr(settings, f'EMAIL_QUEUE_{name}', default)
+
+
+def enqueue_email(subject, message, from_email, recipient_list):
+    """Ставит письма в очередь, по одному на каждого получателя.
+
+    При EMAIL_QUEUE_EAGER очередь разбирается сразу после фиксации
+    транзакции — это удобно в разработке и тестах.
+    """
+    emails = OutgoingEmail.objects.bulk_create(
+        OutgoingEmail(
+            subject=subject,
+            message=message,
+            from_email=from_email,
+            recipient=recipient,
+        )
+        for recipient in recipient_list
+    )
+    if get_queue_setting('EAGER', False):
+        transaction.on_commit(send_queued_emails)
+    return emails
+
+
+def pending_emails(now=None):
+    """Неотправленные и не захваченные письма, время отправки которых
+    наступило."""
+    now = now or timezone.now()
+    return OutgoingEmail.objects.filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lte=now),
+        sent_at__isnull=True,
+        send_after__lte=now,
+        attempts__lt=get_queue_setting('MAX_ATTEMPTS', 5),
+    )
+
+
+def claim_emails(batch_size):
+    """Захватывает до batch_size писем и возвращает их.
+
+    UPDATE повторяет условия выборки, поэтому письмо, которое между
+    выборкой и UPDATE захватил другой отправитель, пропускается.
+    """
+    now = timezone.now()
+    pending = pending_emails(now)
+    ids = list(pending.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    claim = uuid4().hex
+    lease = timedelta(seconds=get_queue_setting('LEASE', 300))
+    claimed = pending.filter(pk__in=ids).update(
+        claim=claim, claimed_until=now + lease
+    )
+    if not claimed:
+        return []
+    return list(OutgoingEmail.objects.filter(claim=claim))
+
+
+def get_retry_delay(attempts):
+    """Пауза перед следующей попыткой: база * 2 ** (попытка - 1)."""
+    base = get_queue_setting('RETRY_DELAY', 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def send_queued_emails(batch_size=None, connection=None):
+    """Отправляет одну пачку писем и возвращает число отправленных.
+
+    Все письма пачки идут через одно соединение. Ошибка отправки
+    отдельного письма не прерывает пачку: письмо получает отложенную
+    повторную попытку.
+    """
+    batch_size = batch_size or get_queue_setting('BATCH_SIZE', 100)
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0
+    connection = connection or get_connection()
+    sent = []
+    connection.open()
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=email.from_email,
+                to=(email.recipient,),
+                connection=connection,
+            )
+            email.attempts += 1
+            email.claimed_until = None
+            try:
+                message.send()
+            except Exception as error:
+                email.last_error = f'{type(error).__name__}: {error}'
+                email.send_after = (
+                    timezone.now() + get_retry_delay(email.attempts)
+                )
+            else:
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent.append(email)
+    finally:
+        connection.close()
+    OutgoingEmail.objects.bulk_update(
+        emails,
+        ['attempts', 'sent_at', 'send_after', 'last_error', 'claimed_until'],
+    )
+    return len(sent)
@@ -0,0 +1,202 @@
+"""Генерация синтетических данных для нагрузочных замеров.
+
+Популярность произведений и активность пользователей распределены по
+закону Ципфа: немногие произведения собирают большую часть отзывов, а
+немногие отзывы — большую часть комментариев. Генератор детерминирован
+при одинаковом --seed.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import response_cache
+from api.snapshots import rebuild_snapshots
+from reviews.management.commands.import_csv import preserve_timestamps
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    User,
+)
+from reviews.ratings import rebuild_ratings
+
+WORDS = (
+    'red', 'night', 'river', 'city', 'silent', 'winter', 'garden', 'storm',
+    'golden', 'shadow', 'iron', 'star', 'ocean', 'last', 'house', 'wolf',
+    'summer', 'glass', 'road', 'dream', 'north', 'fire', 'moon', 'king',
+)
+# Оценки смещены к высоким, как на реальных сайтах отзывов.
+SCORE_WEIGHTS = (1, 1, 2, 2, 4, 6, 10, 14, 12, 8)
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса рангов 1..size для random.choices."""
+    ranks = range(1, size + 1)
+    return list(accumulate(1 / rank ** exponent for rank in ranks))
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими данными с неравномерным спросом.'
+
+    def add_arguments(self, parser):
+        for name, default in (('users', 200), ('categories', 5),
+                              ('genres', 15), ('titles', 500),
+                              ('reviews', 5000), ('comments', 10000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Число создаваемых объектов ({default} по умолчанию).',
+            )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел.',
+        )
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help='Префикс имен, slug и username создаваемых объектов.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число строк в одном INSERT.',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            categories = self.create_named(Category, options['categories'])
+            genres = self.create_named(Genre, options['genres'])
+            titles = self.create_titles(options['titles'], categories, genres)
+            reviews = self.create_reviews(options['reviews'], titles, users)
+            self.create_comments(options['comments'], reviews, users)
+            rebuild_ratings(Title.objects.filter(pk__in=titles))
+        response_cache.invalidate_all()
+        rebuild_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: {users} пользователей, {titles} произведений, '
+            '{reviews} отзывов, {comments} комментариев.'.format(
+                users=len(users), titles=len(titles), reviews=len(reviews),
+                comments=options['comments'],
+            )
+        ))
+
+    def words(self, count):
+        return ' '.join(self.random.choices(WORDS, k=count))
+
+    def past_date(self, days=730):
+        seconds = self.random.randrange(days * 24 * 60 * 60)
+        return self.now - timedelta(seconds=seconds)
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_users(self, count):
+        password = make_password(None)
+        self.bulk_create(User, [
+            User(
+                username=f'{self.prefix}_user_{index}',
+                email=f'{self.prefix}_user_{index}@yamdb.fake',
+                password=password,
+                bio=self.words(8),
+            )
+            for index in range(count)
+        ])
+        return list(User.objects.filter(
+            username__startswith=f'{self.prefix}_user_'
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_named(self, model, count):
+        name = model._meta.model_name
+        self.bulk_create(model, [
+            model(name=f'{name.title()} {index}',
+                  slug=f'{self.prefix}-{name}-{index}')
+            for index in range(count)
+        ])
+        return list(model.objects.filter(
+            slug__startswith=f'{self.prefix}-{name}-'
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_titles(self, count, categories, genres):
+        self.bulk_create(Title, [
+            Title(
+                name=f'{self.prefix} {self.words(3)} {index}',
+                year=self.random.randint(1950, self.now.year),
+                description=self.words(30),
+                category_id=self.random.choice(categories),
+            )
+            for index in range(count)
+        ])
+        titles = list(Title.objects.filter(
+            name__startswith=f'{self.prefix} '
+        ).order_by('pk').values_list('pk', flat=True))
+        self.bulk_create(GenreTitle, [
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id in titles
+            for genre_id in self.random.sample(
+                genres, k=min(len(genres), self.random.randint(1, 3))
+            )
+        ])
+        return titles
+
+    def create_reviews(self, count, titles, users):
+        """Отзывы с учетом уникальности пары автор-произведение."""
+        title_weights = zipf_weights(len(titles))
+        user_weights = zipf_weights(len(users), exponent=0.8)
+        count = min(count, len(titles) * len(users))
+        pairs = set()
+        # Около насыщения редкие пары почти не выпадают: число раундов
+        # ограничено, и отзывов может получиться меньше запрошенного.
+        for _ in range(20):
+            if len(pairs) >= count:
+                break
+            pairs.update(zip(
+                self.random.choices(
+                    titles, cum_weights=title_weights, k=count - len(pairs)
+                ),
+                self.random.choices(
+                    users, cum_weights=user_weights, k=count - len(pairs)
+                ),
+            ))
+        with preserve_timestamps(Review, {'pub_date'}):
+            self.bulk_create(Review, [
+                Review(
+                    title_id=title_id,
+                    author_id=author_id,
+                    text=self.words(40),
+                    score=self.random.choices(
+                        range(1, 11), weights=SCORE_WEIGHTS
+                    )[0],
+                    pub_date=self.past_date(),
+                )
+                for title_id, author_id in sorted(pairs)
+            ])
+        return list(Review.objects.filter(
+            title_id__in=titles
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def create_comments(self, count, reviews, users):
+        if not reviews:
+            return
+        review_weights = zipf_weights(len(reviews))
+        with preserve_timestamps(Comment, {'pub_date'}):
+            self.bulk_create(Comment, [
+                Comment(
+                    review_id=review_id,
+                    author_id=self.random.choice(users),
+                    text=self.words(15),
+                    pub_date=self.past_date(),
+                )
+                for review_id in self.random.choices(
+                    reviews, cum_weights=review_weights, k=count
+                )
+            ])
@@ -0,0 +1,265 @@
+"""Загрузка CSV-дампов из static/data в таблицы приложения reviews.
+
+Разбор и проверка порций строк могут выполняться в пуле процессов, а
+запись ведет один процесс. После каждой записанной порции обновляется
+файл контрольной точки, поэтому прерванный импорт продолжается с места
+остановки.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+
+from api.cache import response_cache
+from api.membership import ID_BITMAPS
+from api.snapshots import rebuild_snapshots
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    User,
+)
+from reviews.ratings import rebuild_ratings
+
+# Файлы в порядке зависимостей по внешним ключам и переименования
+# колонок CSV в поля моделей.
+IMPORT_ORDER = (
+    ('users.csv', User, {}),
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': 'category_id'}),
+    ('genre_title.csv', GenreTitle, {}),
+    ('review.csv', Review, {'author': 'author_id'}),
+    ('comments.csv', Comment, {'author': 'author_id'}),
+)
+
+csv.field_size_limit(sys.maxsize)
+
+
+def parse_row(model, columns, row):
+    """Приводит строку CSV к значениям полей модели."""
+    values = {}
+    for column, value in row.items():
+        field = model._meta.get_field(columns.get(column, column))
+        if value == '' and field.null:
+            values[field.attname] = None
+        else:
+            values[field.attname] = field.to_python(value)
+    if model is User and 'password' not in values:
+        values['password'] = make_password(None)
+    return values
+
+
+def parse_chunk(model_label, columns, line, chunk):
+    """Разбирает порцию строк; выполняется и в дочерних процессах."""
+    model = apps.get_model(model_label)
+    try:
+        return [parse_row(model, columns, row) for row in chunk]
+    except ValidationError as error:
+        raise CommandError(f'ошибка в строках до {line}: {error}')
+
+
+def read_chunks(path, size, skip=0):
+    """Читает CSV порциями по size строк, не загружая файл целиком.
+
+    Первые skip строк данных пропускаются без разбора.
+    """
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        for _ in islice(reader, skip):
+            pass
+        while True:
+            chunk = list(islice(reader, size))
+            if not chunk:
+                return
+            yield reader.line_num, chunk
+
+
+class Checkpoint:
+    """Число записанных строк по каждому файлу в JSON-файле."""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as checkpoint_file:
+                self.state = json.load(checkpoint_file)
+
+    def get(self, filename):
+        return self.state.get(filename, 0)
+
+    def mark(self, filename, rows):
+        self.state[filename] = rows
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(self.state, checkpoint_file)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+@contextmanager
+def preserve_timestamps(model, columns):
+    """Сохраняет даты из дампа вместо auto_now_add при bulk_create."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False) and field.name in columns
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Загружает CSV-файлы из static/data в базу данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=str(settings.BASE_DIR / 'static' / 'data'),
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Число строк в одной транзакции.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Число процессов для разбора строк.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки (по умолчанию в каталоге данных).',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать импорт заново, игнорируя контрольную точку.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = Checkpoint(
+            options['checkpoint']
+            or os.path.join(options['path'], '.import_checkpoint.json')
+        )
+        if options['restart']:
+            checkpoint.clear()
+        # Порция, записанная перед сбоем, могла не попасть в контрольную
+        # точку: первую порцию после возобновления вставляем без конфликтов.
+        self.resuming = bool(checkpoint.state)
+        self.workers = options['workers']
+        self.executor = None
+        if self.workers > 1:
+            connections.close_all()
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=django.setup
+            )
+        try:
+            for filename, model, columns in IMPORT_ORDER:
+                self.import_file(
+                    os.path.join(options['path'], filename), model, columns,
+                    options['batch_size'], checkpoint,
+                )
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+        self.reset_sequences()
+        rebuild_ratings()
+        response_cache.invalidate_all()
+        # Объекты загружены с явными id и без сигналов.
+        for bitmap in ID_BITMAPS.values():
+            bitmap.reset()
+        rebuild_snapshots()
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS('Импорт завершен.'))
+
+    def parse_chunks(self, model, columns, chunks):
+        """Разобранные порции в исходном порядке.
+
+        В пуле процессов одновременно разбирается не больше двух порций
+        на процесс, чтобы память не росла с размером файла.
+        """
+        label = model._meta.label
+        if self.executor is None:
+            for line, chunk in chunks:
+                yield parse_chunk(label, columns, line, chunk)
+            return
+        pending = deque()
+        limit = self.workers * 2
+        for line, chunk in chunks:
+            pending.append(self.executor.submit(
+                parse_chunk, label, columns, line, chunk
+            ))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def import_file(self, path, model, columns, batch_size, checkpoint):
+        filename = os.path.basename(path)
+        started = time.monotonic()
+        committed = checkpoint.get(filename)
+        total = 0
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            header = next(csv.reader(csv_file))
+        with preserve_timestamps(model, {columns.get(c, c) for c in header}):
+            chunks = read_chunks(path, batch_size, skip=committed)
+            try:
+                for rows in self.parse_chunks(model, columns, chunks):
+                    self.write_batch(
+                        model, rows, ignore_conflicts=self.resuming
+                    )
+                    self.resuming = False
+                    committed += len(rows)
+                    total += len(rows)
+                    checkpoint.mark(filename, committed)
+            except CommandError as error:
+                raise CommandError(f'{path}: {error}')
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model._meta.db_table}: {total} строк за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с)'
+        )
+
+    def write_batch(self, model, rows, ignore_conflicts=False):
+        with transaction.atomic():
+            model.objects.bulk_create(
+                (model(**row) for row in rows),
+                ignore_conflicts=ignore_conflicts,
+            )
+
+    def reset_sequences(self):
+        """Сдвигает последовательности после вставки явных id."""
+        models = [model for _, model, _ in IMPORT_ORDER]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
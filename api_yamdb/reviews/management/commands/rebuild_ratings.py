@@ -0,0 +1,23 @@
+"""Пересчет гистограмм оценок, рейтингов и списков лучших.
+
+Нужен после изменения отзывов в обход ORM или параметров взвешенного
+рейтинга LEADERBOARD_PRIOR_*: все гистограммы считаются одним
+сгруппированным запросом к отзывам.
+"""
+from django.core.management.base import BaseCommand
+
+from api.cache import response_cache
+from api.snapshots import rebuild_snapshots
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает гистограммы оценок и рейтинги произведений.'
+
+    def handle(self, *args, **options):
+        rated = rebuild_ratings()
+        response_cache.invalidate_all()
+        rebuild_snapshots()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны рейтинги, произведений с отзывами: {rated}.'
+        ))
@@ -0,0 +1,51 @@
+"""Отправка писем из очереди OutgoingEmail.
+
+По умолчанию команда работает как демон и опрашивает очередь с заданным
+интервалом; с --once разбирает очередь до конца и завершается.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.mail import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Число писем, отправляемых через одно соединение.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза между опросами пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            try:
+                sent = send_queued_emails(options['batch_size'])
+            except Exception as error:
+                if options['once']:
+                    raise
+                self.stderr.write(f'Ошибка соединения: {error}')
+                time.sleep(options['interval'])
+                continue
+            total += sent
+            if sent:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {total}.'))
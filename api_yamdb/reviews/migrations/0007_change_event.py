@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32, verbose_name='Модель')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='id объекта')),
+                ('action', models.CharField(choices=[('create', 'Создание'), ('update', 'Изменение'), ('delete', 'Удаление')], max_length=6, verbose_name='Действие')),
+                ('path', models.CharField(max_length=255, verbose_name='Адрес объекта в API')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата события')),
+            ],
+            options={
+                'verbose_name': 'Событие журнала изменений',
+                'verbose_name_plural': 'Журнал изменений',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['model', 'object_id', 'id'], name='change_event_object_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 3.2 on 2026-10-18 19:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Value, When
+import django.db.models.deletion
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    mean = getattr(settings, 'LEADERBOARD_PRIOR_MEAN', 5.5)
+    weight = getattr(settings, 'LEADERBOARD_PRIOR_WEIGHT', 5)
+    size = getattr(settings, 'LEADERBOARD_SIZE', 20)
+    Title.objects.update(score=Case(
+        When(review_count=0, then=Value(None)),
+        default=(Value(float(mean * weight)) + F('rating_sum'))
+        / (Value(float(weight)) + F('review_count')),
+        output_field=FloatField(),
+    ))
+    titles = Title.objects.filter(score__isnull=False).order_by('-score', '-id')
+    boards = [('all', 0, titles)]
+    boards.extend(
+        ('category', category_id, titles.filter(category_id=category_id))
+        for category_id in apps.get_model(
+            'reviews', 'Category'
+        ).objects.values_list('id', flat=True)
+    )
+    boards.extend(
+        ('genre', genre_id, titles.filter(genre__id=genre_id))
+        for genre_id in apps.get_model(
+            'reviews', 'Genre'
+        ).objects.values_list('id', flat=True)
+    )
+    for scope, scope_id, board in boards:
+        LeaderboardEntry.objects.bulk_create(
+            LeaderboardEntry(
+                scope=scope, scope_id=scope_id, title_id=title_id,
+                score=score,
+            )
+            for title_id, score in board.values_list('id', 'score')[:size]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('category', 'Категория'), ('genre', 'Жанр')], max_length=8, verbose_name='Список')),
+                ('scope_id', models.PositiveIntegerField(default=0, verbose_name='id категории или жанра')),
+                ('score', models.FloatField(verbose_name='Взвешенный рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Место в списке лучших',
+                'verbose_name_plural': 'Списки лучших',
+                'ordering': ['scope', 'scope_id', '-score', '-title_id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['score', 'id'], name='title_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'score', 'id'], name='title_category_score_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='title',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_id', 'title'), name='uniq_leaderboard_entry'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
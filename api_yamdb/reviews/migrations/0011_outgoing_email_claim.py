@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='claim',
+            field=models.CharField(blank=True, max_length=32, verbose_name='Метка отправителя'),
+        ),
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Захвачено до'),
+        ),
+    ]
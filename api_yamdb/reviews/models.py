@@ -1,4 +1,5 @@
 import datetime as dt
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import (
@@ -83,6 +84,15 @@ class Genre(models.Model):
         return self.name
 
 
+def vote_counter(score):
+    """Счетчик отзывов с оценкой score в гистограмме произведения."""
+    return models.PositiveIntegerField(
+        verbose_name=f'Оценок {score}',
+        default=0,
+        editable=False,
+    )
+
+
 class Title(models.Model):
     """Модель произведений, с ограничением по году выхода."""
     name = models.CharField(max_length=256)
@@ -105,9 +115,67 @@ class Title(models.Model):
         blank=True,
         related_name='titles',
         verbose_name='Категории', )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    score = models.FloatField(
+        verbose_name='Взвешенный рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    # Гистограмма оценок: число отзывов с каждой оценкой от 1 до 10.
+    votes_1 = vote_counter(1)
+    votes_2 = vote_counter(2)
+    votes_3 = vote_counter(3)
+    votes_4 = vote_counter(4)
+    votes_5 = vote_counter(5)
+    votes_6 = vote_counter(6)
+    votes_7 = vote_counter(7)
+    votes_8 = vote_counter(8)
+    votes_9 = vote_counter(9)
+    votes_10 = vote_counter(10)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         ordering = ['id']
+        # Сортировки каталога ?ordering=: id — замыкающее поле, поэтому
+        # индекс обслуживает и прямой, и обратный порядок, а курсорная
+        # пагинация получает уникальный ключ.
+        indexes = [
+            models.Index(
+                fields=['category', 'rating', 'id'],
+                name='title_category_rating_idx',
+            ),
+            models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+            models.Index(
+                fields=['review_count', 'id'],
+                name='title_review_count_idx',
+            ),
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(fields=['score', 'id'], name='title_score_idx'),
+            models.Index(
+                fields=['category', 'score', 'id'],
+                name='title_category_score_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -127,6 +195,14 @@ class GenreTitle(models.Model):
         verbose_name='произведение'
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['genre', 'title'],
+                name='uniq_genre_title'
+            )
+        ]
+
 
 class Review(models.Model):
     title = models.ForeignKey(
@@ -155,11 +231,25 @@ class Review(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='review_author_pub_date_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -188,8 +278,176 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='comment_author_pub_date_idx',
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=256,
+    )
+    message = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.EmailField(
+        verbose_name='Отправитель',
+        max_length=254,
+    )
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=254,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+    send_after = models.DateTimeField(
+        verbose_name='Отправить после',
+        default=timezone.now,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    claim = models.CharField(
+        verbose_name='Метка отправителя',
+        max_length=32,
+        blank=True,
+    )
+    claimed_until = models.DateTimeField(
+        verbose_name='Захвачено до',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipient}'
+
+
+class ChangeEvent(models.Model):
+    """Событие журнала изменений каталога; id — номер в журнале."""
+    class Action(models.TextChoices):
+        CREATE = 'create', _('Создание')
+        UPDATE = 'update', _('Изменение')
+        DELETE = 'delete', _('Удаление')
+
+    model = models.CharField(
+        verbose_name='Модель',
+        max_length=32,
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='id объекта',
+    )
+    action = models.CharField(
+        verbose_name='Действие',
+        max_length=6,
+        choices=Action.choices,
+    )
+    path = models.CharField(
+        verbose_name='Адрес объекта в API',
+        max_length=255,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата события',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Событие журнала изменений'
+        verbose_name_plural = 'Журнал изменений'
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['model', 'object_id', 'id'],
+                name='change_event_object_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model} {self.object_id}'
+
+
+class LeaderboardEntry(models.Model):
+    """Произведение в списке лучших: всего каталога, категории или жанра.
+
+    Списки поддерживает reviews.leaderboards. Записи удаляются вместе с
+    произведением обработчиком сигнала, который заодно дополняет список,
+    поэтому внешний ключ без ограничения в БД.
+    """
+    class Scope(models.TextChoices):
+        ALL = 'all', _('Все произведения')
+        CATEGORY = 'category', _('Категория')
+        GENRE = 'genre', _('Жанр')
+
+    scope = models.CharField(
+        verbose_name='Список',
+        max_length=8,
+        choices=Scope.choices,
+    )
+    scope_id = models.PositiveIntegerField(
+        verbose_name='id категории или жанра',
+        default=0,
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Произведение',
+    )
+    score = models.FloatField(
+        verbose_name='Взвешенный рейтинг',
+    )
+
+    class Meta:
+        verbose_name = 'Место в списке лучших'
+        verbose_name_plural = 'Списки лучших'
+        ordering = ['scope', 'scope_id', '-score', '-title_id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'scope_id', 'title'],
+                name='uniq_leaderboard_entry',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} {self.scope_id}: {self.title_id}'
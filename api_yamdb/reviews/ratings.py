@@ -0,0 +1,152 @@
+"""Поддержка денормализованного рейтинга произведений.
+
+Сумма оценок, количество отзывов и гистограмма оценок (votes_1..votes_10)
+хранятся в самой модели Title и обновляются одним UPDATE при каждой
+записи отзыва, поэтому чтение каталога не агрегирует таблицу отзывов, а
+гистограмма всегда согласована со средним. Вместе с рейтингом
+пересчитывается взвешенный рейтинг списков лучших (см.
+reviews.leaderboards).
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from reviews.leaderboards import (
+    rebuild_leaderboards,
+    sync_title,
+    sync_titles,
+)
+from reviews.models import Review, Title
+
+SCORES = range(1, 11)
+HISTOGRAM_FIELDS = tuple(f'votes_{score}' for score in SCORES)
+REBUILD_BATCH_SIZE = 500
+
+
+def get_rating_expressions(rating_sum=None, review_count=None):
+    """Выражения рейтинга и взвешенного рейтинга по сумме и числу оценок.
+
+    Взвешенный рейтинг — байесовское среднее
+    (C * m + сумма оценок) / (C + число отзывов). Без отзывов оба — NULL.
+    Выражения можно передать, чтобы пересчитать рейтинг в том же UPDATE,
+    что сдвигает сумму и число оценок.
+    """
+    rating_sum = rating_sum if rating_sum is not None else F('rating_sum')
+    review_count = NullIf(
+        review_count if review_count is not None else F('review_count'),
+        Value(0),
+    )
+    mean = getattr(settings, 'LEADERBOARD_PRIOR_MEAN', 5.5)
+    weight = getattr(settings, 'LEADERBOARD_PRIOR_WEIGHT', 5)
+    return {
+        'rating': ExpressionWrapper(
+            Cast(rating_sum, FloatField()) / review_count,
+            output_field=FloatField(),
+        ),
+        'score': ExpressionWrapper(
+            (Value(float(mean * weight)) + rating_sum)
+            / (Value(float(weight)) + review_count),
+            output_field=FloatField(),
+        ),
+    }
+
+
+def get_histogram(title):
+    """Число отзывов с каждой оценкой: {1: ..., 10: ...}."""
+    return {
+        score: getattr(title, field)
+        for score, field in zip(SCORES, HISTOGRAM_FIELDS)
+    }
+
+
+def apply_score_change(title_id, added=None, removed=None):
+    """Атомарно добавляет оценку added и/или убирает оценку removed."""
+    if added == removed:
+        return
+    changes = {
+        'rating_sum': F('rating_sum') + (added or 0) - (removed or 0),
+        'review_count': (
+            F('review_count') + (added is not None) - (removed is not None)
+        ),
+    }
+    changes.update(get_rating_expressions(
+        changes['rating_sum'], changes['review_count']
+    ))
+    if added is not None:
+        changes[f'votes_{added}'] = F(f'votes_{added}') + 1
+    if removed is not None:
+        changes[f'votes_{removed}'] = F(f'votes_{removed}') - 1
+    titles = Title.objects.filter(pk=title_id)
+    with transaction.atomic():
+        titles.update(**changes, updated_at=timezone.now())
+        sync_title(title_id)
+
+
+def remove_scores(removed):
+    """Убирает оценки пар (произведение, оценка) пакетно: по UPDATE на
+    оценку и число убранных с ней отзывов, затем общая синхронизация
+    списков лучших."""
+    counts = Counter(removed)
+    groups = defaultdict(list)
+    for (title_id, score), total in counts.items():
+        groups[score, total].append(title_id)
+    now = timezone.now()
+    with transaction.atomic():
+        for (score, total), title_ids in groups.items():
+            changes = {
+                'rating_sum': F('rating_sum') - score * total,
+                'review_count': F('review_count') - total,
+            }
+            changes.update(get_rating_expressions(
+                changes['rating_sum'], changes['review_count']
+            ))
+            changes[f'votes_{score}'] = F(f'votes_{score}') - total
+            Title.objects.filter(pk__in=title_ids).update(
+                **changes, updated_at=now
+            )
+        sync_titles(title_id for title_id, _ in counts)
+
+
+def rebuild_ratings(titles=None):
+    """Пересчитывает гистограммы, суммы и рейтинги по таблице отзывов.
+
+    Отзывы читаются одним сгруппированным запросом (произведение, оценка),
+    сумма и число отзывов выводятся из гистограммы.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    histograms = defaultdict(dict)
+    for title_id, score, total in Review.objects.filter(
+        title__in=titles
+    ).order_by().values('title_id', 'score').annotate(
+        total=Count('pk')
+    ).values_list('title_id', 'score', 'total'):
+        histograms[title_id][score] = total
+    rated = []
+    for title_id, histogram in histograms.items():
+        title = Title(pk=title_id)
+        for score, field in zip(SCORES, HISTOGRAM_FIELDS):
+            setattr(title, field, histogram.get(score, 0))
+        title.rating_sum = sum(
+            score * total for score, total in histogram.items()
+        )
+        title.review_count = sum(histogram.values())
+        rated.append(title)
+    with transaction.atomic():
+        titles.update(
+            rating_sum=0,
+            review_count=0,
+            updated_at=timezone.now(),
+            **dict.fromkeys(HISTOGRAM_FIELDS, 0),
+        )
+        Title.objects.bulk_update(
+            rated, ('rating_sum', 'review_count', *HISTOGRAM_FIELDS),
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+        titles.update(**get_rating_expressions())
+        rebuild_leaderboards()
+    return len(rated)
@@ -0,0 +1,205 @@
+"""Полнотекстовый поиск по названию и описанию произведений.
+
+Бэкенд выбирается по типу БД или настройкой `TITLE_SEARCH_BACKEND`
+(путь к классу). Для SQLite индекс хранится в виртуальной таблице FTS5,
+которую синхронизируют триггеры на `reviews_title`, поэтому в индекс
+попадают любые записи, включая `bulk_create` и `update()`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import Expression
+from django.db.models.sql.constants import INNER
+from django.utils.module_loading import import_string
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class BaseTitleSearchBackend:
+    """Интерфейс бэкенда поиска произведений."""
+
+    def install(self, connection):
+        """Создает структуры индекса, если их еще нет."""
+
+    def rebuild(self, connection):
+        """Полностью перестраивает индекс по таблице произведений."""
+
+    def search(self, queryset, query):
+        """Фильтрует queryset по запросу и сортирует по релевантности."""
+        raise NotImplementedError
+
+    @staticmethod
+    def tokenize(query):
+        return TOKEN_PATTERN.findall(query)
+
+
+class IContainsSearchBackend(BaseTitleSearchBackend):
+    """Запасной бэкенд на `icontains` для БД без полнотекстового индекса."""
+
+    def search(self, queryset, query):
+        for token in self.tokenize(query):
+            queryset = queryset.filter(
+                Q(name__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset
+
+
+class MatchJoin:
+    """INNER JOIN результата одного MATCH `(rowid, rank)` к произведениям.
+
+    Совместим с записями Query.alias_map (см. django.db.models.sql.
+    datastructures.Join): MATCH выполняется один раз на запрос, а не для
+    каждой найденной строки, как в коррелированном подзапросе.
+    """
+    join_type = INNER
+    nullable = False
+    filtered_relation = None
+
+    def __init__(self, table_name, match, parent_alias, table_alias):
+        self.table_name = table_name
+        self.match = match
+        self.parent_alias = parent_alias
+        self.table_alias = table_alias
+
+    def as_sql(self, compiler, connection):
+        table = self.table_name
+        return (
+            f'{self.join_type} (SELECT rowid, rank FROM {table} '
+            f'WHERE {table} MATCH %s) {self.table_alias} '
+            f'ON ({self.table_alias}.rowid = '
+            f'{compiler.quote_name_unless_alias(self.parent_alias)}."id")',
+            [self.match],
+        )
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(
+            self.table_name, self.match,
+            change_map.get(self.parent_alias, self.parent_alias),
+            change_map.get(self.table_alias, self.table_alias),
+        )
+
+    @property
+    def identity(self):
+        return (
+            self.__class__, self.table_name, self.match, self.parent_alias
+        )
+
+    def __eq__(self, other):
+        return getattr(other, 'identity', None) == self.identity
+
+    def __hash__(self):
+        return hash(self.identity)
+
+    def equals(self, other, with_filtered_relation=True):
+        return self == other
+
+    def demote(self):
+        return self
+
+    def promote(self):
+        return self
+
+
+class MatchRank(Expression):
+    """Столбец rank присоединенного MatchJoin."""
+    output_field = FloatField()
+
+    def __init__(self, alias):
+        super().__init__()
+        self.alias = alias
+
+    def as_sql(self, compiler, connection):
+        return f'{self.alias}.rank', []
+
+    def relabeled_clone(self, change_map):
+        return self.__class__(change_map.get(self.alias, self.alias))
+
+
+class SQLiteFTS5SearchBackend(BaseTitleSearchBackend):
+    """Поиск через виртуальную таблицу SQLite FTS5 с сортировкой по bm25."""
+    content_table = 'reviews_title'
+    table = 'reviews_title_fts'
+
+    def get_install_sql(self):
+        content, table = self.content_table, self.table
+        return (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"name, description, content='{content}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT "
+            f"ON {content} BEGIN "
+            f"INSERT INTO {table}(rowid, name, description) "
+            f"VALUES (new.id, new.name, new.description); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE "
+            f"ON {content} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, name, description) "
+            f"VALUES ('delete', old.id, old.name, old.description); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF "
+            f"name, description ON {content} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, name, description) "
+            f"VALUES ('delete', old.id, old.name, old.description); "
+            f"INSERT INTO {table}(rowid, name, description) "
+            f"VALUES (new.id, new.name, new.description); END",
+        )
+
+    def install(self, connection):
+        """Создает таблицу и триггеры.
+
+        SQLite-миграции Django пересоздают `reviews_title` при изменении
+        полей, что удаляет триггеры, поэтому после их восстановления
+        индекс перестраивается.
+        """
+        if self.content_table not in connection.introspection.table_names():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = %s AND name LIKE %s",
+                [self.content_table, f'{self.table}_%'],
+            )
+            installed = cursor.fetchone()[0] == 3
+            for sql in self.get_install_sql():
+                cursor.execute(sql)
+        if not installed:
+            self.rebuild(connection)
+
+    def rebuild(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')"
+            )
+
+    def get_match_expression(self, query):
+        """Запрос пользователя как набор префиксных термов FTS5."""
+        return ' '.join(f'"{token}"*' for token in self.tokenize(query))
+
+    def search(self, queryset, query):
+        match = self.get_match_expression(query)
+        if not match:
+            return queryset
+        queryset = queryset.all()
+        query = queryset.query
+        join = MatchJoin(
+            self.table, match, query.get_initial_alias(), 'title_search'
+        )
+        query.alias_map[join.table_alias] = join
+        query.alias_refcount[join.table_alias] = 1
+        return queryset.annotate(
+            search_rank=MatchRank(join.table_alias)
+        ).order_by('search_rank', 'pk')
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+
+def get_search_backend(using='default'):
+    """Бэкенд поиска для соединения `using`."""
+    backend_path = getattr(settings, 'TITLE_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    vendor = connections[using].vendor
+    return SEARCH_BACKENDS.get(vendor, IContainsSearchBackend)()
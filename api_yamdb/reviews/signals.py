@@ -0,0 +1,196 @@
+from django.db import connections
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reviews import cascade, leaderboards
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    LeaderboardEntry,
+    Review,
+    Title,
+    User,
+)
+from reviews.ratings import apply_score_change, remove_scores
+from reviews.search import get_search_backend
+
+
+@receiver(pre_delete, sender=Title)
+@receiver(pre_delete, sender=Review)
+@receiver(pre_delete, sender=User)
+def mark_deleting(sender, instance, using, **kwargs):
+    """Отметка для обработчиков зависимых объектов (см. reviews.cascade)."""
+    cascade.mark_deleting(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=User)
+def unmark_deleting(sender, instance, **kwargs):
+    cascade.unmark_deleting(instance)
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """Запоминает оценку и произведение в момент загрузки отзыва."""
+    instance._loaded_score = instance.__dict__.get('score')
+    instance._loaded_title_id = instance.__dict__.get('title_id')
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    """Переносит изменение оценки отзыва в рейтинг произведения."""
+    old_title_id = instance._loaded_title_id
+    old_score = instance._loaded_score
+    if created:
+        apply_score_change(instance.title_id, added=instance.score)
+    elif old_title_id != instance.title_id:
+        apply_score_change(old_title_id, removed=old_score)
+        apply_score_change(instance.title_id, added=instance.score)
+    elif old_score != instance.score:
+        apply_score_change(
+            instance.title_id, added=instance.score, removed=old_score
+        )
+    else:
+        # Текст отзыва входит в представление ?expand=reviews.
+        touch_titles(Title.objects.filter(pk=instance.title_id))
+    instance._loaded_score = instance.score
+    instance._loaded_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    """Убирает оценку удаленного отзыва из рейтинга произведения."""
+    title_id, score = instance._loaded_title_id, instance._loaded_score
+    if cascade.is_deleting(Title, title_id):
+        return
+    # Оценки удаляемого пользователя убираются пакетом после каскада.
+    if cascade.is_deleting(User, instance.author_id) and cascade.defer(
+        'remove_scores', (title_id, score)
+    ):
+        return
+    apply_score_change(title_id, removed=score)
+
+
+@cascade.register_flush('remove_scores')
+def remove_deferred_scores(removed):
+    remove_scores(removed)
+
+
+@receiver(post_migrate)
+def install_title_search(sender, app_config, using, **kwargs):
+    """Создает или восстанавливает полнотекстовый индекс произведений."""
+    if app_config.label != 'reviews':
+        return
+    get_search_backend(using).install(connections[using])
+
+
+def touch_titles(titles):
+    """Отмечает изменение представления произведений без вызова save()."""
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_title(sender, instance, **kwargs):
+    """Число комментариев входит в представление ?expand=comment_counts.
+
+    Удаление отзыва само меняет произведение, а комментарии удаляемого
+    пользователя отмечают свои произведения одним запросом.
+    """
+    if cascade.is_deleting(Review, instance.review_id):
+        return
+    if not cascade.defer('touch_reviews', instance.review_id):
+        touch_titles(Title.objects.filter(reviews=instance.review_id))
+
+
+@cascade.register_flush('touch_reviews')
+def touch_review_titles(review_ids):
+    touch_titles(Title.objects.filter(reviews__in=set(review_ids)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def touch_genre_title(sender, instance, **kwargs):
+    if cascade.is_deleting(Title, instance.title_id):
+        return
+    touch_titles(Title.objects.filter(pk=instance.title_id))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def sync_title_leaderboards(sender, instance, created=False, **kwargs):
+    """Переносит смену категории или жанра в списки лучших."""
+    if sender is Title and created:
+        # У нового произведения нет отзывов, и в списки оно не входит.
+        return
+    if sender is GenreTitle and cascade.is_deleting(Title, instance.title_id):
+        return
+    leaderboards.sync_title(
+        instance.pk if sender is Title else instance.title_id
+    )
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_from_leaderboards(sender, instance, **kwargs):
+    leaderboards.sync_title(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_leaderboard(sender, instance, **kwargs):
+    leaderboards.remove_board(LeaderboardEntry.Scope.CATEGORY, instance.pk)
+
+
+@receiver(post_delete, sender=Genre)
+def remove_genre_leaderboard(sender, instance, **kwargs):
+    leaderboards.remove_board(LeaderboardEntry.Scope.GENRE, instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def sync_leaderboards_on_genres_change(sender, instance, action, reverse,
+                                       pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        leaderboards.sync_title(instance.pk)
+    elif pk_set is None:
+        leaderboards.refill((LeaderboardEntry.Scope.GENRE, instance.pk))
+    else:
+        for title_id in pk_set:
+            leaderboards.sync_title(title_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genres_change(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+    elif pk_set is None:
+        touch_titles(Title.objects.filter(genre=instance))
+    else:
+        touch_titles(Title.objects.filter(pk__in=pk_set))
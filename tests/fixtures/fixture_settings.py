@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_email_queue(settings):
+    """Тесты регистрации проверяют mail.outbox сразу после запроса."""
+    settings.EMAIL_QUEUE_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    """Превышение бюджета SQL-запросов вьюсета проваливает тест."""
+    settings.QUERY_BUDGET_STRICT = True
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_writes(self, admin_client, user_client,
+                                             moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_title(admin_client, title_id)['rating'] is None, (
+            'У произведения без отзывов рейтинг должен быть `None`.'
+        )
+
+        review = create_single_review(user_client, title_id, 'текст', 4)
+        create_single_review(moderator_client, title_id, 'текст', 8)
+        assert self.get_title(admin_client, title_id)['rating'] == 6, (
+            'Проверьте, что рейтинг пересчитывается при создании отзыва.'
+        )
+
+        review_url = (
+            f'/api/v1/titles/{title_id}/reviews/{review.json()["id"]}/'
+        )
+        response = user_client.patch(review_url, data={'score': 10})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(admin_client, title_id)['rating'] == 9, (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки.'
+        )
+
+        response = user_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_title(admin_client, title_id)['rating'] == 8, (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва.'
+        )
+
+    def test_02_rating_follows_orm_writes(self, admin_client, admin, user):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        Review.objects.create(title=title, author=admin, text='a', score=3)
+        Review.objects.create(title=title, author=user, text='b', score=6)
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (9, 2)
+        assert title.rating == 4.5
+
+        Review.objects.filter(author=user).delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (3, 1)
+        assert title.rating == 3
+
+        admin.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (0, 0)
+        assert title.rating is None
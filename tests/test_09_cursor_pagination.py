@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def collect(self, client, url):
+        ids, previous = [], None
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'В режиме курсора ответ не должен содержать `count`.'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            previous, url = data['previous'], data['next']
+        return ids, previous
+
+    def test_01_titles_cursor(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        for idx in range(9):
+            Title.objects.create(name=f'title {idx}', year=2000,
+                                 description='')
+        expected = list(Title.objects.values_list('id', flat=True))
+
+        ids, previous = self.collect(
+            client, '/api/v1/titles/?pagination=cursor'
+        )
+        assert ids == expected, (
+            'Проверьте, что при `?pagination=cursor` по ссылкам `next` '
+            'обходятся все произведения по порядку и без повторов.'
+        )
+        response = client.get(previous)
+        assert [item['id'] for item in response.json()['results']] == (
+            expected[5:10]
+        ), 'Проверьте ссылку `previous` в режиме курсора.'
+
+    def test_02_reviews_cursor(self, admin_client, client,
+                               django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        for idx in range(7):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(title=title, author=author, text='t',
+                                  score=5)
+        Review.objects.update(pub_date=Review.objects.first().pub_date)
+        expected = list(
+            title.reviews.order_by('pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+
+        ids, _ = self.collect(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        )
+        assert ids == expected, (
+            'Проверьте, что курсор по отзывам учитывает `id` при '
+            'одинаковой `pub_date`.'
+        )
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get('/api/v1/genres/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,55 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+from tests.utils import count_queries
+
+MAX_TITLE_LIST_QUERIES = 4
+MAX_TITLE_DETAIL_QUERIES = 3
+
+
+def create_catalog(count):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    titles = []
+    for idx in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, description='',
+            category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleQueries:
+
+    def test_01_title_list_queries(self, client):
+        create_catalog(1)
+        single = count_queries(client, '/api/v1/titles/')
+        Title.objects.all().delete()
+        Category.objects.all().delete()
+        Genre.objects.all().delete()
+        create_catalog(5)
+        full = count_queries(client, '/api/v1/titles/')
+        assert single == full, (
+            'Проверьте, что число запросов к БД при GET-запросе к '
+            '`/api/v1/titles/` не зависит от количества произведений '
+            'на странице.'
+        )
+        assert full <= MAX_TITLE_LIST_QUERIES, (
+            'Проверьте, что для списка произведений категории и жанры '
+            'загружаются через `select_related`/`prefetch_related`.'
+        )
+
+    def test_02_title_detail_queries(self, client):
+        title = create_catalog(1)[0]
+        assert count_queries(
+            client, f'/api/v1/titles/{title.id}/'
+        ) <= MAX_TITLE_DETAIL_QUERIES, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/{title_id}/` '
+            'выполняет фиксированное число запросов к БД.'
+        )
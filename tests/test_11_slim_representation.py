@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import count_queries, create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11SlimRepresentation:
+
+    def test_01_slim_review_and_comment(self, admin_client, admin,
+                                        user_client, user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+
+        response = client.get(
+            f'/api/v1/titles/{title_id}/reviews/?representation=slim'
+        )
+        assert response.status_code == HTTPStatus.OK
+        review = response.json()['results'][0]
+        assert review['title'] == title_id, (
+            'В облегченном представлении отзыва поле `title` должно '
+            'содержать id произведения.'
+        )
+        assert review['author'] == admin.username
+
+        url = (
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+            '?representation=slim'
+        )
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        comment = response.json()['results'][0]
+        assert comment['review'] == review_id, (
+            'В облегченном представлении комментария поле `review` должно '
+            'содержать id отзыва.'
+        )
+        assert comment['author'] == admin.username
+
+    def test_02_comment_list_queries(self, admin_client, admin,
+                                     user_client, user, moderator_client,
+                                     moderator, client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        counts = []
+        for mode in ('', '?representation=slim'):
+            two_comments = count_queries(client, url + mode)
+            moderator_client.post(url, data={'text': 'ещё'})
+            three_comments = count_queries(client, url + mode)
+            assert two_comments == three_comments, (
+                'Проверьте, что число запросов к БД для списка комментариев '
+                'не зависит от количества комментариев.'
+            )
+            counts.append(three_comments)
+            moderator.comments.all().delete()
+        assert counts[1] < counts[0], (
+            'Облегченное представление должно выполнять меньше запросов.'
+        )
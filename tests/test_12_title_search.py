@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from reviews.search import get_search_backend
+
+
+def search(client, query, param='search'):
+    response = client.get('/api/v1/titles/', {param: query})
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    def test_01_search_name_and_description(self, client):
+        Title.objects.create(name='Терминатор', year=1984,
+                             description='Киборг из будущего')
+        Title.objects.create(name='Чужой', year=1979,
+                             description='Космический ужас')
+        Title.objects.create(name='Крепкий орешек', year=1988,
+                             description='Терминал аэропорта не при чём')
+
+        assert search(client, 'терм') == ['Терминатор', 'Крепкий орешек'], (
+            'Проверьте, что `?search=` ищет по префиксу в названии и '
+            'описании и сортирует результаты по релевантности.'
+        )
+        assert search(client, 'космический ужас', param='q') == ['Чужой'], (
+            'Проверьте, что `?q=` требует совпадения всех слов запроса.'
+        )
+        assert search(client, 'нет такого') == []
+
+    def test_02_index_follows_title_writes(self, client):
+        title = Title.objects.create(name='Старое', year=2000,
+                                     description='')
+        title.name = 'Новое'
+        title.save()
+        assert search(client, 'старое') == []
+        assert search(client, 'новое') == ['Новое'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        Title.objects.filter(pk=title.pk).delete()
+        assert search(client, 'новое') == []
+
+    def test_03_match_runs_once(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Красный {index}', year=2000, description='')
+            for index in range(30)
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/', {'search': 'красный'})
+        assert response.json()['count'] == 30
+        for query in context.captured_queries:
+            assert query['sql'].count('MATCH') <= 1, (
+                'Проверьте, что MATCH выполняется один раз на запрос, а не '
+                'коррелированным подзапросом для каждой строки.'
+            )
+        queryset = get_search_backend().search(Title.objects.all(), 'красный')
+        assert 'CORRELATED' not in queryset.explain()
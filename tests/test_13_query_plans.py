@@ -0,0 +1,86 @@
+import pytest
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.views import (CategoryViewSet, CustomCommentViewSet,
+                       CustomReviewViewSet, GenreViewSet, TitleViewSet)
+from reviews.models import Comment, Review, Title
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Планы запросов проверяются для SQLite.'
+)
+
+
+def get_plan(queryset):
+    """План запроса первой страницы списка."""
+    return queryset[:5].explain()
+
+
+def viewset_queryset(viewset_class, url='/', **kwargs):
+    view = viewset_class(
+        request=Request(APIRequestFactory().get(url)),
+        kwargs=kwargs,
+        format_kwarg=None,
+        action='list',
+    )
+    return view.filter_queryset(view.get_queryset())
+
+
+def assert_uses_index(plan, url, index=None):
+    assert 'TEMP B-TREE' not in plan, (
+        f'Проверьте, что список `{url}` сортируется по индексу, а не '
+        f'временным B-деревом:\n{plan}'
+    )
+    assert index is None or index in plan, (
+        f'Проверьте, что список `{url}` читается по индексу `{index}`:'
+        f'\n{plan}'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13QueryPlans:
+
+    def test_01_catalog_lists(self):
+        for viewset_class, url in (
+            (TitleViewSet, '/api/v1/titles/'),
+            (CategoryViewSet, '/api/v1/categories/'),
+            (GenreViewSet, '/api/v1/genres/'),
+        ):
+            assert_uses_index(get_plan(viewset_queryset(viewset_class)), url)
+
+    def test_02_reviews_and_comments(self, user):
+        title = Title.objects.create(name='t', year=2000, description='')
+        review = Review.objects.create(title=title, author=user, text='t',
+                                       score=5)
+        Comment.objects.create(review=review, author=user, text='t')
+
+        plan = get_plan(viewset_queryset(
+            CustomReviewViewSet, title_id=title.id
+        ))
+        assert_uses_index(plan, '/api/v1/titles/{title_id}/reviews/',
+                          'review_title_pub_date_idx')
+
+        plan = get_plan(viewset_queryset(
+            CustomCommentViewSet, title_id=title.id, review_id=review.id
+        ))
+        assert_uses_index(
+            plan, '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            'comment_review_pub_date_idx'
+        )
+
+    def test_03_author_listings(self, user):
+        for queryset, index in (
+            (user.reviews.order_by('pub_date'), 'review_author_pub_date_idx'),
+            (user.comments.order_by('pub_date'),
+             'comment_author_pub_date_idx'),
+        ):
+            assert_uses_index(get_plan(queryset), 'author listing', index)
+
+    def test_04_genre_title_lookup(self):
+        plan = get_plan(Title.objects.filter(genre__slug='drama'))
+        assert 'USING COVERING INDEX' in plan, (
+            'Проверьте, что связи жанров и произведений читаются по '
+            f'уникальному индексу (genre, title):\n{plan}'
+        )
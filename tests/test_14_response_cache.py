@@ -0,0 +1,132 @@
+import pytest
+from django.db import transaction
+
+from api.cache import response_cache
+from api.views import TitleViewSet
+from reviews.models import Category, Review, Title
+from tests.utils import count_queries, create_titles
+
+
+@pytest.fixture(params=['locmem', 'filebased'])
+def cache_backend(request, settings, tmp_path):
+    if request.param == 'filebased':
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+    return request.param
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ResponseCache:
+
+    def test_01_anonymous_catalog_reads_are_cached(self, cache_backend,
+                                                   admin_client, client):
+        create_titles(admin_client)
+        for url in ('/api/v1/titles/', '/api/v1/categories/',
+                    '/api/v1/genres/'):
+            count_queries(client, url)
+            assert count_queries(client, url) == 0, (
+                f'Проверьте, что повторный анонимный GET-запрос к `{url}` '
+                'отдается из кэша.'
+            )
+        assert count_queries(admin_client, '/api/v1/genres/') > 0, (
+            'Авторизованные запросы не должны кэшироваться.'
+        )
+
+    def test_02_tags_invalidate_responses(self, cache_backend, admin_client,
+                                          admin, client):
+        titles, categories, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        list_url = '/api/v1/titles/?category=films'
+        detail_url = f'/api/v1/titles/{title.id}/'
+        client.get(list_url)
+        client.get(detail_url)
+
+        Review.objects.create(title=title, author=admin, text='t', score=7)
+        assert client.get(detail_url).json()['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения.'
+        )
+        assert client.get(list_url).json()['results'][0]['rating'] == 7
+
+        category = Category.objects.get(slug=categories[0]['slug'])
+        category.name = 'Кино'
+        category.save()
+        assert client.get(list_url).json()['results'][0]['category'][
+            'name'
+        ] == 'Кино', (
+            'Проверьте, что изменение категории сбрасывает кэш списков '
+            'произведений этой категории.'
+        )
+
+        title.genre.clear()
+        assert client.get(detail_url).json()['genre'] == [], (
+            'Проверьте, что изменение жанров сбрасывает кэш произведения.'
+        )
+        Title.objects.create(name='Новое', year=2000, description='',
+                             category=category)
+        assert client.get(list_url).json()['count'] == 2, (
+            'Проверьте, что новое произведение сбрасывает кэш списков.'
+        )
+
+    def test_03_review_reorders_cached_rating_pages(self, cache_backend,
+                                                     admin, client):
+        titles = [
+            Title.objects.create(name=f't{index}', year=2000,
+                                 description='')
+            for index in range(7)
+        ]
+        for score, title in enumerate(titles[1:], start=1):
+            Review.objects.create(title=title, author=admin, text='t',
+                                  score=score)
+        url = '/api/v1/titles/?ordering=-rating'
+        names = [title['name'] for title in client.get(url).json()['results']]
+        assert names[0] == 't6'
+        assert count_queries(client, url) == 0
+
+        Review.objects.create(title=titles[0], author=admin, text='t',
+                              score=10)
+        names = [title['name'] for title in client.get(url).json()['results']]
+        assert names[0] == 't0', (
+            'Проверьте, что новый отзыв сбрасывает кэш списков, '
+            'отсортированных по рейтингу, даже если произведения не было '
+            'на странице.'
+        )
+
+    def test_04_invalidation_after_commit(self, cache_backend, admin):
+        title = Title.objects.create(name='t', year=2000, description='')
+        tags = {f'title:{title.pk}', 'titles:rating'}
+        before = response_cache.get_tag_versions(tags)
+        with transaction.atomic():
+            Review.objects.create(title=title, author=admin, text='t',
+                                  score=7)
+            assert response_cache.get_tag_versions(tags) == before, (
+                'Проверьте, что теги сбрасываются после фиксации транзакции: '
+                'иначе параллельный запрос закэширует прежние данные под '
+                'новыми версиями тегов.'
+            )
+        after = response_cache.get_tag_versions(tags)
+        assert all(after[tag] != before[tag] for tag in tags)
+
+    def test_05_commit_while_computing_response(self, cache_backend, admin,
+                                                client, monkeypatch):
+        title = Title.objects.create(name='t', year=2000, description='')
+        get_tags = TitleViewSet.get_response_cache_tags
+
+        def commit_then_tag(view, data):
+            # Отзыв фиксируется между чтением базы и сохранением ответа.
+            monkeypatch.setattr(TitleViewSet, 'get_response_cache_tags',
+                                get_tags)
+            Review.objects.create(title=title, author=admin, text='t',
+                                  score=7)
+            return get_tags(view, data)
+
+        monkeypatch.setattr(TitleViewSet, 'get_response_cache_tags',
+                            commit_then_tag)
+        monkeypatch.setattr(TitleViewSet, 'query_budget', None)
+        url = f'/api/v1/titles/{title.pk}/'
+        assert client.get(url).json()['rating'] is None
+        assert client.get(url).json()['rating'] == 7, (
+            'Проверьте, что ответ, вычисленный до фиксации изменения, не '
+            'сохраняется под версиями тегов после нее.'
+        )
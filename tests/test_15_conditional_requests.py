@@ -0,0 +1,172 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+from tests.utils import (
+    create_comments,
+    create_single_comment,
+    create_single_review,
+    create_titles,
+)
+
+
+def conditional_get(client, url, **headers):
+    reset_queries()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalRequests:
+
+    def test_01_title_detail_etag(self, admin_client, admin, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = admin_client.get(url)
+        etag = response['ETag']
+        assert etag.startswith('"'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'строгий ETag.'
+        )
+        assert response.has_header('Last-Modified')
+
+        response, queries = conditional_get(
+            admin_client, url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что запрос с совпадающим `If-None-Match` получает '
+            'ответ 304.'
+        )
+        assert response['ETag'] == etag
+        assert queries <= 2, (
+            'Ответ 304 должен формироваться без загрузки и сериализации '
+            'объекта.'
+        )
+
+        client.get(url)
+        response, queries = conditional_get(
+            client, url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert queries == 0, (
+            'Ответ 304 на анонимный запрос должен отдаваться из кэша.'
+        )
+
+        Review.objects.create(title_id=titles[0]['id'], author=admin,
+                              text='t', score=9)
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет ETag произведения.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_review_and_comment_lists(self, admin_client, admin,
+                                         user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+
+        for url in (reviews_url, comments_url):
+            response = user_client.get(url)
+            response = user_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что `{url}` поддерживает `If-Modified-Since`.'
+            )
+
+        etag = user_client.get(comments_url)['ETag']
+        user_client.delete(f'{comments_url}{comments[1]["id"]}/')
+        response = user_client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление комментария меняет ETag списка.'
+        )
+        etag = response['ETag']
+        admin_client.patch(f'{reviews_url}{review_id}/', data={'score': 1})
+        response = user_client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет ETag списка его '
+            'комментариев.'
+        )
+
+    def test_03_list_validators_from_parent(self, admin_client, admin,
+                                            user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        for url in (reviews_url, comments_url):
+            for params in ('', '?pagination=cursor'):
+                with CaptureQueriesContext(connection) as context:
+                    response = user_client.get(url + params)
+                assert response.status_code == HTTPStatus.OK
+                assert response.has_header('ETag')
+                assert not [
+                    query for query in context.captured_queries
+                    if 'MAX(' in query['sql']
+                    or params and 'COUNT(' in query['sql']
+                ], (
+                    f'Проверьте, что валидаторы `{url + params}` берутся из '
+                    f'родителя без агрегата по всему списку.'
+                )
+        etag = user_client.get(reviews_url)['ETag']
+        Review.objects.filter(pk=reviews[0]['id']).get().delete()
+        response = user_client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва меняет ETag списка отзывов.'
+        )
+
+    def test_04_title_cursor_pages_skip_aggregate(self, admin_client,
+                                                  user_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == HTTPStatus.OK
+        assert not response.has_header('ETag')
+        assert not [
+            query for query in context.captured_queries
+            if 'MAX(' in query['sql'] or 'COUNT(' in query['sql']
+        ], 'Проверьте, что курсорные страницы не считают агрегат каталога.'
+
+    def test_05_non_numeric_pk(self, admin_client, user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for url in ('/api/v1/titles/abc/', f'{reviews_url}abc/'):
+            for api_client in (client, user_client):
+                response = api_client.get(url)
+                assert response.status_code == HTTPStatus.NOT_FOUND, (
+                    f'Проверьте, что `{url}` с нечисловым id отвечает 404.'
+                )
+
+    def test_06_updated_at_not_in_payload(self, admin_client, admin, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(admin_client, title_id, 'т', 5).json()
+        comment = create_single_comment(admin_client, title_id, review['id'],
+                                        'к').json()
+        assert 'updated_at' not in review and 'updated_at' not in comment
+        assert 'updated_at' not in review['title']
+        assert 'updated_at' not in comment['review']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        for url in (
+            '/api/v1/titles/',
+            reviews_url,
+            f'{reviews_url}?representation=slim',
+            f'{reviews_url}{review["id"]}/comments/',
+        ):
+            for item in client.get(url).json()['results']:
+                assert 'updated_at' not in item, (
+                    f'Проверьте, что служебное поле `updated_at` не '
+                    f'выводится в ответе `{url}`.'
+                )
+        assert 'updated_at' not in client.get(
+            f'/api/v1/titles/{title_id}/'
+        ).json()
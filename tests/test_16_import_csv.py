@@ -0,0 +1,81 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.management.commands import import_csv
+from reviews.models import Comment, Genre, Review, Title, User
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def count_rows(filename):
+    with open(os.path.join(DATA_PATH, filename), encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ImportCSV:
+
+    def test_01_import_static_data(self):
+        call_command('import_csv', batch_size=10, stdout=StringIO())
+
+        for model, filename in ((User, 'users.csv'), (Genre, 'genre.csv'),
+                                (Title, 'titles.csv'),
+                                (Review, 'review.csv'),
+                                (Comment, 'comments.csv')):
+            assert model.objects.count() == count_rows(filename), (
+                f'Проверьте, что `import_csv` загружает все строки '
+                f'`{filename}`.'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что `import_csv` сохраняет `pub_date` из дампа.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.review_count == len(scores)
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после импорта пересчитываются рейтинги.'
+        )
+        user = User.objects.create(username='new', email='new@yamdb.fake')
+        assert user.pk > max(
+            User.objects.exclude(pk=user.pk).values_list('pk', flat=True)
+        )
+
+    def test_02_resume_after_failure(self, tmp_path, monkeypatch):
+        checkpoint = tmp_path / 'checkpoint.json'
+        write_batch = import_csv.Command.write_batch
+        written = []
+
+        def failing_write_batch(self, model, rows, **kwargs):
+            if model is Review and len(written) == 2:
+                raise RuntimeError('сбой импорта')
+            write_batch(self, model, rows, **kwargs)
+            if model is Review:
+                written.append(len(rows))
+
+        monkeypatch.setattr(
+            import_csv.Command, 'write_batch', failing_write_batch
+        )
+        with pytest.raises(RuntimeError):
+            call_command('import_csv', batch_size=10,
+                         checkpoint=str(checkpoint), stdout=StringIO())
+        assert checkpoint.exists(), (
+            'Проверьте, что `import_csv` сохраняет контрольную точку после '
+            'каждой записанной порции.'
+        )
+        assert Review.objects.count() == 20
+        monkeypatch.setattr(import_csv.Command, 'write_batch', write_batch)
+
+        call_command('import_csv', batch_size=10, workers=2,
+                     checkpoint=str(checkpoint), stdout=StringIO())
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что повторный запуск продолжает импорт с '
+            'контрольной точки.'
+        )
+        assert Comment.objects.count() == count_rows('comments.csv')
+        assert not checkpoint.exists()
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.mail import send_queued_emails
+from reviews.models import OutgoingEmail
+
+
+class FailingBackend:
+    """Бэкенд, не принимающий письма на заданный адрес."""
+
+    def __init__(self, fail_for):
+        self.fail_for = fail_for
+        self.opened = 0
+        self.sent = []
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.fail_for in message.to:
+                raise ConnectionError('недоступен')
+            self.sent.append(message)
+        return len(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17EmailQueue:
+    url_signup = '/api/v1/auth/signup/'
+
+    def test_01_signup_only_enqueues(self, client, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        response = client.post(self.url_signup, data={
+            'email': 'queued@yamdb.fake', 'username': 'queued'
+        })
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при регистрации письмо только ставится в '
+            'очередь, а не отправляется в рамках запроса.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'queued@yamdb.fake'
+        assert email.sent_at is None
+
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда `send_emails --once` отправляет письма '
+            'из очереди.'
+        )
+        assert mail.outbox[0].to == ['queued@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 1
+
+    def test_02_batch_with_retries(self, settings):
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 2
+        settings.EMAIL_QUEUE_RETRY_DELAY = 0
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(subject='s', message='m', from_email='a@yamdb.fake',
+                          recipient=f'user{index}@yamdb.fake')
+            for index in range(3)
+        )
+        backend = FailingBackend('user1@yamdb.fake')
+        assert send_queued_emails(connection=backend) == 2
+        assert backend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        failed = OutgoingEmail.objects.get(recipient='user1@yamdb.fake')
+        assert failed.sent_at is None and failed.attempts == 1
+        assert 'недоступен' in failed.last_error
+
+        assert send_queued_emails(connection=backend) == 0
+        failed.refresh_from_db()
+        assert failed.attempts == 2
+        assert send_queued_emails(connection=backend) == 0
+        failed.refresh_from_db()
+        assert failed.attempts == 2, (
+            'Проверьте, что письмо не отправляется после исчерпания попыток.'
+        )
+
+    def test_03_filebased_backend(self, settings, tmp_path):
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        OutgoingEmail.objects.create(subject='s', message='код 123',
+                                     from_email='a@yamdb.fake',
+                                     recipient='b@yamdb.fake')
+        call_command('send_emails', '--once')
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1
+        assert 'код 123' in files[0].read_text()
+
+    def test_04_concurrent_senders(self):
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(subject='s', message='m', from_email='a@yamdb.fake',
+                          recipient=f'user{index}@yamdb.fake')
+            for index in range(3)
+        )
+        first, second = FailingBackend(None), FailingBackend(None)
+        nested = []
+
+        def send_messages(messages):
+            # Второй отправитель запускается посреди пачки первого.
+            if not nested:
+                nested.append(send_queued_emails(connection=second))
+            return FailingBackend.send_messages(first, messages)
+
+        first.send_messages = send_messages
+        assert send_queued_emails(connection=first) == 3
+        assert nested == [0] and not second.sent, (
+            'Проверьте, что письма, захваченные одним отправителем, не '
+            'отправляет другой.'
+        )
+
+    def test_05_expired_claim(self):
+        email = OutgoingEmail.objects.create(
+            subject='s', message='m', from_email='a@yamdb.fake',
+            recipient='b@yamdb.fake', claim='crashed',
+            claimed_until=timezone.now() + timedelta(minutes=5),
+        )
+        backend = FailingBackend(None)
+        assert send_queued_emails(connection=backend) == 0
+        email.claimed_until = timezone.now() - timedelta(seconds=1)
+        email.save()
+        assert send_queued_emails(connection=backend) == 1, (
+            'Проверьте, что письма упавшего отправителя отправляются после '
+            'истечения срока захвата.'
+        )
+        email.refresh_from_db()
+        assert email.sent_at and email.claimed_until is None
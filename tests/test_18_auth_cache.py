@@ -0,0 +1,41 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import count_queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18AuthCache:
+    url_me = '/api/v1/users/me/'
+    url_users = '/api/v1/users/'
+
+    def test_01_user_is_cached(self, user_client):
+        first = count_queries(user_client, self.url_me)
+        assert count_queries(user_client, self.url_me) == first - 1, (
+            'Проверьте, что пользователь из JWT-токена берется из кэша и '
+            'не загружается из базы на каждый запрос.'
+        )
+
+    def test_02_changes_invalidate_cache(self, admin_client, user_client,
+                                         user):
+        assert user_client.get(self.url_users).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        admin_client.patch(f'{self.url_users}{user.username}/',
+                           data={'role': 'admin'})
+        assert user_client.get(self.url_users).status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение роли пользователя сразу сбрасывает '
+            'его запись в кэше аутентификации.'
+        )
+
+        user_client.patch(self.url_me, data={'bio': 'new bio'})
+        assert user_client.get(self.url_me).json()['bio'] == 'new bio'
+
+        admin_client.delete(f'{self.url_users}{user.username}/')
+        assert user_client.get(self.url_me).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что удаленный пользователь не аутентифицируется '
+            'из кэша.'
+        )
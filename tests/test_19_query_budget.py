@@ -0,0 +1,61 @@
+import logging
+
+import pytest
+
+from api.middleware import QueryBudgetExceeded
+from api.views import TitleViewSet
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19QueryBudget:
+    url = '/api/v1/titles/'
+
+    def test_01_strict_mode_fails_request(self, admin_client, client,
+                                          monkeypatch):
+        create_titles(admin_client)
+        monkeypatch.setattr(TitleViewSet, 'query_budget', {'list': 1})
+        with pytest.raises(QueryBudgetExceeded) as error:
+            client.get(self.url)
+        assert '"budget": 1' in str(error.value), (
+            'Проверьте, что превышение бюджета запросов прерывает запрос '
+            'в строгом режиме.'
+        )
+
+    def test_02_warning_with_duplicates(self, admin_client, client,
+                                        monkeypatch, settings, caplog):
+        create_titles(admin_client)
+        settings.QUERY_BUDGET_STRICT = False
+        settings.QUERY_BUDGET_DUPLICATE_LIMIT = 1
+        monkeypatch.setattr(
+            TitleViewSet, 'get_queryset',
+            lambda self: TitleViewSet.queryset.model.objects.all(),
+        )
+        with caplog.at_level(logging.WARNING, logger='api.queries'):
+            response = client.get(self.url)
+        assert response.status_code == 200
+        records = [r for r in caplog.records if r.name == 'api.queries']
+        assert len(records) == 1, (
+            'Проверьте, что вне строгого режима превышение бюджета '
+            'записывается в журнал `api.queries`.'
+        )
+        report = records[0].query_report
+        assert report['view'] == 'TitleViewSet.list'
+        assert report['queries'] > report['budget']
+        assert report['duplicates'], (
+            'Проверьте, что повторяющиеся SQL-запросы (N+1) попадают в отчет.'
+        )
+
+    def test_03_server_error_is_not_masked(self, admin_client, client,
+                                           monkeypatch):
+        create_titles(admin_client)
+        monkeypatch.setattr(TitleViewSet, 'query_budget', {'list': 1})
+
+        def fail(view, request, *args, **kwargs):
+            list(TitleViewSet.queryset.model.objects.all())
+            list(TitleViewSet.queryset.model.objects.all())
+            raise ValueError('настоящая ошибка')
+
+        monkeypatch.setattr(TitleViewSet, 'list', fail)
+        with pytest.raises(ValueError, match='настоящая ошибка'):
+            client.get(self.url)
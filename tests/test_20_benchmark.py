@@ -0,0 +1,67 @@
+import json
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.management.commands.benchmark_api import (
+    get_search_word,
+    percentile,
+)
+from api.urls import router
+from reviews.models import Comment, Review, Title, User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Benchmark:
+
+    def test_01_generate_data(self):
+        call_command('generate_data', users=20, titles=30, reviews=200,
+                     comments=300, seed=1, stdout=StringIO())
+        assert User.objects.count() == 20
+        assert Title.objects.count() == 30
+        assert Comment.objects.count() == 300
+        counts = sorted(
+            Title.objects.values_list('review_count', flat=True),
+            reverse=True,
+        )
+        assert sum(counts) == Review.objects.count()
+        assert counts[0] > 3 * counts[len(counts) // 2], (
+            'Проверьте, что отзывы распределены по произведениям '
+            'неравномерно.'
+        )
+
+    def test_02_benchmark_report(self, tmp_path):
+        call_command('generate_data', users=10, titles=10, reviews=40,
+                     comments=40, stdout=StringIO())
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmark_api', requests=3, output=str(output),
+                     stdout=StringIO())
+        report = json.loads(output.read_text())
+        scenarios = report['scenarios']
+        for prefix, _, _ in router.registry:
+            pattern = re.compile(rf'^/api/v1/{prefix}/(\w+/)?$')
+            assert any(
+                pattern.match(row['path']) for row in scenarios.values()
+            ), f'Проверьте, что бенчмарк обращается к маршруту `{prefix}`.'
+        for name, row in scenarios.items():
+            assert row['p50_ms'] <= row['p95_ms'] <= row['p99_ms']
+            assert max(row['statuses']) < 400, (
+                f'Сценарий `{name}` завершился ошибкой: {row["statuses"]}.'
+            )
+        assert {'auth-signup', 'auth-token', 'comments-delete'} <= set(
+            scenarios
+        )
+
+    def test_03_percentile(self):
+        assert percentile([1, 2, 3, 4], 0.5) == 2.5
+        assert percentile([5], 0.99) == 5
+
+    def test_04_search_word(self):
+        assert get_search_word('Улисс') == 'Улисс', (
+            'Проверьте, что слово для поиска находится и в названии из '
+            'одного слова.'
+        )
+        assert get_search_word('benchmark red fox 12') == 'benchmark'
+        assert get_search_word('1984') == '1984'
@@ -0,0 +1,145 @@
+import gzip
+from http import HTTPStatus
+
+import pytest
+
+from api import snapshots
+from api.views import TitleViewSet
+from reviews.models import Review, Title
+from tests.utils import count_queries, create_titles
+
+
+def snapshot_file(snapshot_dir, basename, page):
+    """Файл снимка текущего поколения для хоста тестового клиента."""
+    return (snapshot_dir / 'http-testserver' / basename
+            / snapshots.get_generation(basename) / f'{page}.json')
+
+
+@pytest.fixture
+def snapshot_dir(settings, tmp_path):
+    settings.API_SNAPSHOT_DIR = str(tmp_path / 'snapshots')
+    settings.API_SNAPSHOT_HOSTS = ['testserver']
+    return tmp_path / 'snapshots'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Snapshots:
+
+    def test_01_lists_served_from_disk(self, snapshot_dir, admin_client,
+                                       client):
+        create_titles(admin_client)
+        for basename in ('categories', 'genres', 'titles'):
+            url = f'/api/v1/{basename}/'
+            expected = client.get(url).content
+            assert snapshot_file(
+                snapshot_dir, basename, 1
+            ).read_bytes() == expected, (
+                f'Проверьте, что ответ на анонимный запрос к `{url}` '
+                'сохраняется в снимок.'
+            )
+            assert count_queries(client, url) == 0
+            response = client.get(url)
+            assert response.content == expected
+            etag = response['ETag']
+            response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+            assert response['Content-Encoding'] == 'gzip', (
+                f'Проверьте, что `{url}` отдает сжатый снимок клиентам, '
+                'поддерживающим gzip.'
+            )
+            assert gzip.decompress(response.content) == expected
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_02_only_plain_anonymous_requests(self, snapshot_dir,
+                                              admin_client, client):
+        create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        for response in (
+            client.get('/api/v1/titles/?year=1994',
+                       HTTP_ACCEPT_ENCODING='gzip'),
+            client.get('/api/v1/titles/?page=9',
+                       HTTP_ACCEPT_ENCODING='gzip'),
+            admin_client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip'),
+        ):
+            assert not response.has_header('Content-Encoding'), (
+                'Проверьте, что снимки не отдаются авторизованным '
+                'пользователям и запросам с фильтрами.'
+            )
+        assert not snapshot_file(snapshot_dir, 'titles', 9).exists()
+
+    def test_03_catalog_changes_rebuild_snapshots(self, snapshot_dir,
+                                                  admin_client, admin,
+                                                  client):
+        titles, _, _ = create_titles(admin_client)
+        for basename in ('categories', 'titles'):
+            client.get(f'/api/v1/{basename}/')
+
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Музыка', 'slug': 'music'})
+        snapshot = snapshot_file(snapshot_dir, 'categories', 1)
+        assert 'music' in snapshot.read_text(), (
+            'Проверьте, что снимки перестраиваются после изменения каталога.'
+        )
+        assert count_queries(client, '/api/v1/categories/') == 0
+        assert client.get('/api/v1/categories/').json()['count'] == 3
+
+        Review.objects.create(title_id=titles[0]['id'], author=admin,
+                              text='t', score=6)
+        assert not snapshot_file(snapshot_dir, 'titles', 1).exists(), (
+            'Проверьте, что новый отзыв удаляет снимки произведений, а не '
+            'перестраивает их.'
+        )
+        ratings = {
+            title['id']: title['rating']
+            for title in client.get('/api/v1/titles/').json()['results']
+        }
+        assert ratings[titles[0]['id']] == 6
+
+        Title.objects.all().delete()
+        assert client.get('/api/v1/titles/').json()['results'] == []
+
+    def test_04_unknown_hosts_bypass_snapshots(self, snapshot_dir,
+                                               admin_client, client):
+        create_titles(admin_client)
+        for index in range(3):
+            response = client.get('/api/v1/titles/',
+                                  HTTP_HOST=f'host{index}.example')
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['next'] is None
+        assert not snapshot_dir.exists() or not list(snapshot_dir.iterdir()), (
+            'Проверьте, что снимки не создаются для хостов вне '
+            'API_SNAPSHOT_HOSTS.'
+        )
+        client.get('/api/v1/categories/')
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Музыка', 'slug': 'music'})
+        assert [path.name for path in snapshot_dir.iterdir()] == [
+            'http-testserver'
+        ]
+
+    def test_05_stale_write_is_not_served(self, snapshot_dir, admin_client,
+                                          admin, client, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        write_snapshot = snapshots.write_snapshot
+
+        def commit_then_write(*args):
+            # Отзыв фиксируется между чтением базы и записью снимка.
+            monkeypatch.setattr(snapshots, 'write_snapshot', write_snapshot)
+            Review.objects.create(title_id=titles[0]['id'], author=admin,
+                                  text='t', score=6)
+            write_snapshot(*args)
+
+        monkeypatch.setattr(snapshots, 'write_snapshot', commit_then_write)
+        # Запросы отзыва выполняются внутри запроса списка.
+        monkeypatch.setattr(TitleViewSet, 'query_budget', None)
+        response = client.get('/api/v1/titles/')
+        assert all(title['rating'] is None
+                   for title in response.json()['results'])
+        ratings = {
+            title['id']: title['rating']
+            for title in client.get('/api/v1/titles/').json()['results']
+        }
+        assert ratings[titles[0]['id']] == 6, (
+            'Проверьте, что снимок, прочитанный до фиксации изменения, не '
+            'отдается после нее.'
+        )
@@ -0,0 +1,108 @@
+import csv
+import json
+import warnings
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import Review, Title
+from tests.utils import create_comments, create_titles
+
+
+def read_stream(response):
+    assert response.streaming, (
+        'Проверьте, что выгрузка отдается потоковым ответом.'
+    )
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Export:
+    url = '/api/v1/export/'
+
+    def test_01_titles_ndjson_and_csv(self, admin_client, settings):
+        settings.API_EXPORT_CHUNK_SIZE = 1
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.get(f'{self.url}titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in read_stream(response).split(
+            '\n'
+        ) if line]
+        assert [row['id'] for row in rows] == sorted(
+            title['id'] for title in titles
+        ), (
+            'Проверьте, что выгрузка содержит все произведения, '
+            'прочитанные порциями.'
+        )
+        by_id = {title['id']: title for title in titles}
+        for row in rows:
+            title = by_id[row['id']]
+            assert row['category'] == title['category']
+            assert row['genre'] == sorted(title['genre'])
+            assert 'rating' in row
+
+        response = admin_client.get(f'{self.url}titles/?format=csv')
+        assert response['Content-Type'].startswith('text/csv')
+        reader = list(csv.DictReader(StringIO(read_stream(response))))
+        assert len(reader) == len(titles)
+        assert reader[0]['name'] == rows[0]['name']
+
+    def test_02_reviews_comments_since(self, admin_client, admin,
+                                       user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        for name, expected in (('reviews', reviews), ('comments', comments)):
+            lines = read_stream(
+                admin_client.get(f'{self.url}{name}/')
+            ).splitlines()
+            assert len(lines) == len(expected)
+            assert json.loads(lines[0])['author'] in (
+                admin.username, user.username
+            )
+
+        past = timezone.now() - timedelta(days=1)
+        Review.objects.update(updated_at=past)
+        Title.objects.update(updated_at=past)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.text = 'изменен'
+        review.save()
+        since = (past + timedelta(hours=1)).isoformat()
+        lines = read_stream(admin_client.get(
+            f'{self.url}reviews/', {'since': since}
+        )).splitlines()
+        assert [json.loads(line)['id'] for line in lines] == [review.id], (
+            'Проверьте, что параметр `since` оставляет только объекты, '
+            'измененные после указанной даты.'
+        )
+        response = admin_client.get(f'{self.url}reviews/?since=вчера')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        tomorrow = (timezone.now() + timedelta(days=1)).date()
+        for value, expected in (
+            (past.date().isoformat(), len(reviews)),
+            (tomorrow.isoformat(), 0),
+            ((past + timedelta(hours=1)).replace(tzinfo=None).isoformat(),
+             1),
+        ):
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', RuntimeWarning)
+                response = admin_client.get(
+                    f'{self.url}reviews/', {'since': value}
+                )
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что `since` принимает дату без времени и время '
+                'без часового пояса.'
+            )
+            assert len(read_stream(response).splitlines()) == expected
+
+    def test_03_admin_only(self, client, user_client):
+        for api_client in (client, user_client):
+            response = api_client.get(f'{self.url}titles/')
+            assert response.status_code in (
+                HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN
+            ), 'Проверьте, что выгрузка доступна только администратору.'
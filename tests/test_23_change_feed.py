@@ -0,0 +1,101 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.pagination import ChangeFeedPagination
+from reviews.models import ChangeEvent, Review, Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ChangeFeed:
+    url = '/api/v1/changes/'
+
+    def fetch(self, client, after):
+        response = client.get(self.url, {'after': after})
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_feed_returns_deltas(self, client, admin_client, admin):
+        data = self.fetch(client, 0)
+        assert data['results'] == [] and data['last_seq'] == 0
+
+        titles, _, _ = create_titles(admin_client)
+        data = self.fetch(client, 0)
+        seqs = [event['seq'] for event in data['results']]
+        assert seqs == sorted(seqs) and data['last_seq'] == seqs[-1]
+        created = {
+            event['object_id']: event['path'] for event in data['results']
+            if event['model'] == 'title' and event['action'] == 'create'
+        }
+        assert created == {
+            title['id']: f'/api/v1/titles/{title["id"]}/' for title in titles
+        }, (
+            'Проверьте, что журнал изменений содержит события создания '
+            'произведений с адресом объекта в API.'
+        )
+        last_seq = data['last_seq']
+
+        title_id = titles[0]['id']
+        review = Review.objects.create(title_id=title_id, author=admin,
+                                       text='t', score=5)
+        events = self.fetch(client, last_seq)['results']
+        assert [(e['model'], e['action'], e['object_id']) for e in events] \
+            == [('review', 'create', review.id),
+                ('title', 'update', title_id)], (
+            'Проверьте, что новый отзыв добавляет событие отзыва и событие '
+            'изменения рейтинга произведения.'
+        )
+        assert events[0]['path'] == (
+            f'/api/v1/titles/{title_id}/reviews/{review.id}/'
+        )
+        last_seq = events[-1]['seq']
+
+        Title.objects.get(pk=title_id).delete()
+        events = self.fetch(client, last_seq)['results']
+        assert (events[-1]['model'], events[-1]['action']) == (
+            'title', 'delete'
+        )
+        assert ('review', 'delete', review.id) in [
+            (e['model'], e['action'], e['object_id']) for e in events
+        ]
+        data = self.fetch(client, events[-1]['seq'])
+        assert data['results'] == []
+        assert data['last_seq'] == events[-1]['seq']
+
+    def test_02_paging_and_validation(self, client, admin_client,
+                                      monkeypatch):
+        create_titles(admin_client)
+        monkeypatch.setattr(ChangeFeedPagination, 'page_size', 2)
+        data = self.fetch(client, 0)
+        assert len(data['results']) == 2
+        assert data['next'].endswith(f'after={data["last_seq"]}')
+        response = client.get(self.url, {'after': 'abc'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_compaction(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        for year in (1990, 1991, 1992):
+            title.year = year
+            title.save()
+        before = self.fetch(client, 0)['last_seq']
+        title_id = title.id
+        title.delete()
+
+        call_command('compact_changes', stdout=StringIO())
+        events = list(ChangeEvent.objects.values_list(
+            'model', 'object_id', 'action'
+        ))
+        assert len(events) == len(set(
+            (model, object_id) for model, object_id, _ in events
+        )), 'Проверьте, что сжатие оставляет одно событие на объект.'
+        assert ('title', title_id, 'delete') in events
+        events = self.fetch(client, before)['results']
+        assert [(e['model'], e['object_id'], e['action'])
+                for e in events] == [('title', title_id, 'delete')], (
+            'Проверьте, что клиент, начавший синхронизацию до сжатия, '
+            'получает последнее состояние объекта.'
+        )
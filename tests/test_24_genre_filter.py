@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from api.views import TitleViewSet
+from reviews.models import Review
+from tests.test_13_query_plans import viewset_queryset
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24GenreFilter:
+    url = '/api/v1/titles/'
+
+    def get_ids(self, client, query):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK, query
+        return sorted(title['id'] for title in response.json()['results'])
+
+    def test_01_any_and_all(self, admin_client, client):
+        titles, _, genres = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        slugs = [genre['slug'] for genre in genres]
+        for query, expected in (
+            (f'genre={slugs[0]}', [first]),
+            (f'genre={slugs[0]},{slugs[2]}', [first, second]),
+            (f'genre={slugs[0]},{slugs[2]}&genre_mode=any', [first, second]),
+            (f'genre={slugs[0]},{slugs[1]}&genre_mode=all', [first]),
+            (f'genre={slugs[0]},{slugs[2]}&genre_mode=all', []),
+        ):
+            assert self.get_ids(client, query) == expected, (
+                f'Проверьте фильтрацию произведений по `{query}`.'
+            )
+        response = client.get(f'{self.url}?genre={slugs[0]}&genre_mode=x')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_rating_not_multiplied(self, admin_client, admin, user,
+                                      client):
+        titles, _, genres = create_titles(admin_client)
+        for author, score in ((admin, 4), (user, 9)):
+            Review.objects.create(title_id=titles[0]['id'], author=author,
+                                  text='t', score=score)
+        slugs = ','.join(genre['slug'] for genre in genres[:2])
+        results = client.get(f'{self.url}?genre={slugs}').json()['results']
+        assert [(title['id'], title['rating']) for title in results] == [
+            (titles[0]['id'], 6)
+        ], (
+            'Проверьте, что фильтр по нескольким жанрам не дублирует '
+            'произведения и не искажает рейтинг.'
+        )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='План запроса проверяется для SQLite.')
+    def test_03_exists_uses_index(self):
+        plan = viewset_queryset(
+            TitleViewSet, '/api/v1/titles/?genre=a,b&genre_mode=all'
+        )[:5].explain()
+        assert 'SCAN reviews_genretitle' not in plan.replace(
+            'SCAN TABLE', 'SCAN'
+        ), (
+            'Проверьте, что фильтр по жанрам читает связи по индексу:'
+            f'\n{plan}'
+        )
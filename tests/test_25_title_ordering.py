@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+
+from api.pagination import KeysetPagination
+from api.views import TitleViewSet
+from reviews.models import Category, Title
+from tests.test_13_query_plans import assert_uses_index, viewset_queryset
+
+
+def create_catalog():
+    """Произведения с повторяющимися рейтингами и без рейтинга."""
+    category = Category.objects.create(name='Фильм', slug='film')
+    other = Category.objects.create(name='Книга', slug='book')
+    ratings = (7.5, None, 9.0, 7.5, 3.0, None, 7.5, 9.0, 5.0, 7.5, 1.0, 7.5)
+    Title.objects.bulk_create(
+        Title(
+            name=f'Title {index % 4}',
+            year=1990 + index % 3,
+            description='film',
+            category=category if index % 2 else other,
+            rating=rating,
+            review_count=0 if rating is None else index,
+        )
+        for index, rating in enumerate(ratings)
+    )
+    return list(Title.objects.all())
+
+
+def sort_key(field, descending, nulls_first=False):
+    """Ключ сортировки с замыкающим id в направлении поля."""
+    def key(title):
+        value = getattr(title, field)
+        sign = -1 if descending else 1
+        return (
+            (value is None) != nulls_first,
+            0 if value is None else sign * value,
+            sign * title.id,
+        )
+    return key
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleOrdering:
+    url = '/api/v1/titles/'
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, url
+            data = response.json()
+            ids.extend(title['id'] for title in data['results'])
+            url = data['next']
+        return ids
+
+    def test_01_ordering_fields(self, client):
+        titles = create_catalog()
+        for field in ('rating', 'review_count', 'year'):
+            for descending in (False, True):
+                ordering = f"{'-' if descending else ''}{field}"
+                # В SQLite NULL меньше любого значения.
+                expected = [
+                    title.id for title in sorted(titles, key=sort_key(
+                        field, descending, nulls_first=not descending
+                    ))
+                ]
+                assert self.walk(
+                    client, f'{self.url}?ordering={ordering}'
+                ) == expected, (
+                    f'Проверьте сортировку произведений `{ordering}` с '
+                    f'замыкающим `id` в том же направлении.'
+                )
+        names = self.walk(client, f'{self.url}?ordering=-name')
+        assert names == [
+            title.id for title in sorted(
+                titles, key=lambda title: (title.name, title.id),
+                reverse=True,
+            )
+        ]
+
+    def test_02_cursor_pagination(self, client):
+        titles = create_catalog()
+        expected = [
+            title.id for title in sorted(
+                titles, key=sort_key('rating', True)
+            )
+        ]
+        forward = self.walk(
+            client, f'{self.url}?ordering=-rating&pagination=cursor'
+        )
+        assert forward == expected, (
+            'Проверьте, что курсорная пагинация по `-rating` обходит все '
+            'произведения без пропусков и повторов, NULL — в конце.'
+        )
+        film = [
+            title.id for title in sorted(
+                titles, key=sort_key('rating', True)
+            ) if title.category.slug == 'film'
+        ]
+        assert self.walk(
+            client,
+            f'{self.url}?category=film&ordering=-rating&pagination=cursor',
+        ) == film
+
+    def test_03_unsupported_cursor_ordering(self, client):
+        create_catalog()
+        response = client.get(
+            f'{self.url}?search=film&pagination=cursor'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что курсорная пагинация по релевантности поиска '
+            'отклоняется ответом 400.'
+        )
+        response = client.get(
+            f'{self.url}?search=film&ordering=-rating'
+            f'&pagination=cursor'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что явная сортировка заменяет сортировку поиска.'
+        )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='План запроса проверяется для SQLite.')
+    def test_04_top_rated_in_category_uses_index(self):
+        url = '/api/v1/titles/?category=film&ordering=-rating'
+        queryset = viewset_queryset(TitleViewSet, url)
+        paginator = KeysetPagination()
+        paginator.model = queryset.model
+        paginator.ordering = paginator.get_ordering(queryset)
+        for ordered in (queryset,
+                        queryset.order_by(*paginator.get_order_by(False))):
+            assert_uses_index(
+                ordered[:10].explain(), url, 'title_category_rating_idx'
+            )
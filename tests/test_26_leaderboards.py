@@ -0,0 +1,168 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews import leaderboards
+from reviews.models import (
+    Category,
+    Genre,
+    LeaderboardEntry,
+    Review,
+    Title,
+    User,
+)
+from reviews.ratings import rebuild_ratings
+
+Scope = LeaderboardEntry.Scope
+
+
+def create_catalog(count=6):
+    categories = [
+        Category.objects.create(name=f'Категория {index}', slug=f'c{index}')
+        for index in range(2)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {index}', slug=f'g{index}')
+        for index in range(2)
+    ]
+    titles = []
+    for index in range(count):
+        title = Title.objects.create(
+            name=f'Title {index}', year=2000, description='-',
+            category=categories[index % 2],
+        )
+        title.genre.set(genres[:index % 2 + 1])
+        titles.append(title)
+    authors = [
+        User.objects.create(username=f'author{index}',
+                            email=f'author{index}@yamdb.fake')
+        for index in range(4)
+    ]
+    return titles, categories, genres, authors
+
+
+def review(title, author, score):
+    return Review.objects.create(
+        title=title, author=author, text='-', score=score
+    )
+
+
+def assert_boards_consistent():
+    """Каждый список совпадает со списком, построенным заново."""
+    boards = [(Scope.ALL, 0)]
+    boards.extend((Scope.CATEGORY, pk) for pk in Category.objects.values_list(
+        'pk', flat=True
+    ))
+    boards.extend((Scope.GENRE, pk) for pk in Genre.objects.values_list(
+        'pk', flat=True
+    ))
+    size = leaderboards.get_leaderboard_size()
+    for scope, scope_id in boards:
+        expected = list(
+            leaderboards.board_titles(scope, scope_id).order_by(
+                '-score', '-id'
+            ).values_list('id', 'score')[:size]
+        )
+        actual = list(LeaderboardEntry.objects.filter(
+            scope=scope, scope_id=scope_id
+        ).order_by('-score', '-title_id').values_list('title_id', 'score'))
+        assert actual == expected, (
+            f'Проверьте, что список лучших {scope} {scope_id} обновляется '
+            f'при каждой записи отзыва, смене жанров, категории и удалении.'
+        )
+    stale = LeaderboardEntry.objects.exclude(
+        title_id__in=Title.objects.values('id')
+    )
+    assert not stale.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Leaderboards:
+    url = '/api/v1/titles/top/'
+
+    def test_01_bayesian_average(self, client, settings):
+        settings.LEADERBOARD_PRIOR_MEAN = 5
+        settings.LEADERBOARD_PRIOR_WEIGHT = 2
+        titles, _, _, authors = create_catalog(2)
+        review(titles[0], authors[0], 10)
+        for author in authors:
+            review(titles[1], author, 9)
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [entry['title']['id'] for entry in data] == [
+            titles[1].id, titles[0].id
+        ], (
+            'Проверьте, что много оценок 9 ставят произведение выше одной '
+            'оценки 10: рейтинг взвешивается числом отзывов.'
+        )
+        assert data[0]['score'] == pytest.approx((5 * 2 + 36) / (2 + 4))
+        assert data[1]['score'] == pytest.approx((5 * 2 + 10) / (2 + 1))
+        assert data[0]['title']['rating'] == 9
+        assert {'category', 'genre', 'name'} <= set(data[0]['title'])
+
+    def test_02_scopes(self, client):
+        titles, categories, genres, authors = create_catalog(4)
+        for index, title in enumerate(titles):
+            review(title, authors[0], index + 1)
+        for query, expected in (
+            ('', [3, 2, 1, 0]),
+            (f'?category={categories[0].slug}', [2, 0]),
+            (f'?genre={genres[1].slug}', [3, 1]),
+        ):
+            response = client.get(f'{self.url}{query}')
+            assert response.status_code == HTTPStatus.OK, query
+            assert [entry['title']['id'] for entry in response.json()] == [
+                titles[index].id for index in expected
+            ], f'Проверьте список лучших `{query}`.'
+        response = client.get(
+            f'{self.url}?category={categories[0].slug}&genre={genres[0].slug}'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(f'{self.url}?genre=unknown')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_incremental_updates(self, settings, admin_client):
+        settings.LEADERBOARD_SIZE = 2
+        titles, categories, genres, authors = create_catalog(6)
+        reviews = []
+        for index, title in enumerate(titles):
+            reviews.append(review(title, authors[index % 4], index % 5 + 3))
+            assert_boards_consistent()
+        reviews[5].score = 1
+        reviews[5].save()
+        assert_boards_consistent()
+        reviews[0].score = 10
+        reviews[0].save()
+        assert_boards_consistent()
+        reviews[4].delete()
+        assert_boards_consistent()
+        titles[1].genre.remove(genres[1])
+        assert_boards_consistent()
+        genres[1].titles.add(titles[2])
+        assert_boards_consistent()
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[3].id}/',
+            data={'category': categories[0].slug},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert_boards_consistent()
+        titles[0].delete()
+        assert_boards_consistent()
+        genres[0].delete()
+        categories[1].delete()
+        assert_boards_consistent()
+        assert not LeaderboardEntry.objects.filter(
+            scope=Scope.CATEGORY, scope_id=categories[1].id
+        ).exists()
+
+    def test_04_rebuild(self, settings):
+        settings.LEADERBOARD_SIZE = 3
+        titles, _, _, authors = create_catalog(5)
+        for index, title in enumerate(titles):
+            review(title, authors[0], index + 2)
+        LeaderboardEntry.objects.all().delete()
+        settings.LEADERBOARD_PRIOR_WEIGHT = 0
+        rebuild_ratings()
+        assert_boards_consistent()
+        assert Title.objects.get(pk=titles[0].pk).score == 2
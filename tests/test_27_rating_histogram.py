@@ -0,0 +1,111 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title, User
+from reviews.ratings import HISTOGRAM_FIELDS
+from tests.utils import create_titles
+
+
+def assert_consistent(data):
+    histogram = {int(score): count for score, count in data['histogram'].items()}
+    assert sorted(histogram) == list(range(1, 11))
+    total = sum(histogram.values())
+    assert total == data['review_count'], (
+        'Проверьте, что сумма гистограммы равна числу отзывов.'
+    )
+    if total:
+        average = sum(score * count for score, count in histogram.items())
+        assert data['rating'] == pytest.approx(average / total), (
+            'Проверьте, что гистограмма согласована со средней оценкой.'
+        )
+    else:
+        assert data['rating'] is None
+    return histogram
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27RatingHistogram:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/rating/')
+        assert response.status_code == HTTPStatus.OK
+        return assert_consistent(response.json())
+
+    def test_01_histogram_follows_reviews(self, client, admin_client,
+                                          user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        assert self.get_rating(client, title_id) == dict.fromkeys(
+            range(1, 11), 0
+        )
+        created = {}
+        for author_client, score in ((admin_client, 10),
+                                     (user_client, 7),
+                                     (moderator_client, 7)):
+            response = author_client.post(
+                url, data={'text': 'Отзыв', 'score': score}
+            )
+            assert response.status_code == HTTPStatus.CREATED
+            created[author_client] = response.json()['id']
+        histogram = self.get_rating(client, title_id)
+        assert (histogram[10], histogram[7]) == (1, 2), (
+            'Проверьте, что `/titles/{id}/rating/` считает отзывы по '
+            'оценкам.'
+        )
+        response = user_client.patch(
+            f'{url}{created[user_client]}/', data={'score': 3}
+        )
+        assert response.status_code == HTTPStatus.OK
+        histogram = self.get_rating(client, title_id)
+        assert (histogram[7], histogram[3]) == (1, 1), (
+            'Проверьте, что изменение оценки переносит отзыв в гистограмме.'
+        )
+        response = admin_client.delete(f'{url}{created[admin_client]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        histogram = self.get_rating(client, title_id)
+        assert histogram[10] == 0 and sum(histogram.values()) == 2
+        response = client.get(f'/api/v1/titles/{titles[1]["id"] + 100}/rating/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_rebuild_command(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        authors = [
+            User.objects.create(username=f'author{index}',
+                                email=f'author{index}@yamdb.fake')
+            for index in range(5)
+        ]
+        for index, author in enumerate(authors):
+            for title in titles:
+                Review.objects.create(title_id=title['id'], author=author,
+                                      text='-', score=index * 2 + 1)
+        expected = [self.get_rating(client, title['id']) for title in titles]
+        Title.objects.update(
+            rating_sum=0, review_count=0,
+            **dict.fromkeys(HISTOGRAM_FIELDS, 3),
+        )
+        with CaptureQueriesContext(connection) as context:
+            call_command('rebuild_ratings', stdout=StringIO())
+        review_reads = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_reads) == 1 and 'GROUP BY' in review_reads[0], (
+            'Проверьте, что rebuild_ratings читает отзывы одним '
+            'сгруппированным запросом.'
+        )
+        assert [
+            self.get_rating(client, title['id']) for title in titles
+        ] == expected
+
+    def test_03_non_numeric_pk(self, client):
+        response = client.get('/api/v1/titles/abc/rating/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что `/titles/abc/rating/` отвечает 404.'
+        )
@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+
+from api.membership import review_ids, title_ids
+from reviews.models import Review, Title
+from tests.utils import create_titles
+
+
+def selects_from(context, table):
+    """Загрузки объектов модели (не служебные выборки отдельных полей)."""
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(f'SELECT "{table}"."id"')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28ParentLookups:
+
+    def test_01_review_create_queries(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        title_ids.ensure_loaded()
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'т', 'score': 8})
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(selects_from(context, 'reviews_title')) == 1, (
+            'Проверьте, что произведение из URL загружается один раз за '
+            'запрос.'
+        )
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ], (
+            'Проверьте, что повторный отзыв отклоняет ограничение '
+            'uniq_review, а не предварительная проверка.'
+        )
+
+    def test_02_duplicate_review(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = user_client.post(url, data={'text': 'т', 'score': 8})
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(url, data={'text': 'т', 'score': 2})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что второй отзыв пользователя на произведение '
+            'возвращает 400.'
+        )
+        assert 'non_field_errors' in response.json()
+        assert Review.objects.count() == 1
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating, title.review_count, title.votes_2) == (
+            8, 1, 0
+        ), 'Проверьте, что отклоненный отзыв не меняет рейтинг.'
+        response = user_client.post(
+            '/api/v1/titles/0/reviews/', data={'text': 'т', 'score': 8}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_comment_parent(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'т', 'score': 5},
+        )
+        review = response.json()['id']
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review}/comments/'
+        title_ids.ensure_loaded()
+        review_ids.ensure_loaded()
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'к'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['review']['title']['category']
+        assert len(selects_from(context, 'reviews_review')) == 1, (
+            'Проверьте, что отзыв из URL вместе с автором и произведением '
+            'загружается одним запросом.'
+        )
+        wrong = f'/api/v1/titles/{titles[1]["id"]}/reviews/{review}/comments/'
+        for client in (user_client, admin_client):
+            assert client.get(wrong).status_code == HTTPStatus.NOT_FOUND
+            response = client.post(wrong, data={'text': 'к'})
+            assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_other_integrity_errors(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        def fail(**kwargs):
+            raise IntegrityError(
+                'UNIQUE constraint failed: reviews_leaderboardentry.title_id'
+            )
+
+        post_save.connect(fail, sender=Review)
+        try:
+            with pytest.raises(IntegrityError):
+                user_client.post(url, data={'text': 'т', 'score': 8})
+        finally:
+            post_save.disconnect(fail, sender=Review)
+        assert not Review.objects.exists(), (
+            'Проверьте, что ошибка обработчика сигнала не выдается за '
+            'повторный отзыв.'
+        )
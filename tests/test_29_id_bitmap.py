@@ -0,0 +1,137 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api import membership
+from api.membership import review_ids, title_ids
+from reviews.models import Category, Review, Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29IdBitmap:
+
+    def reviews_url(self, title_id):
+        return f'/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_missing_ids_without_queries(self, client, admin_client,
+                                            admin):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        review = Review.objects.create(
+            title_id=second, author=admin, text='т', score=5
+        )
+        title_ids.ensure_loaded()
+        review_ids.ensure_loaded()
+        assert client.get(self.reviews_url(second)).status_code == (
+            HTTPStatus.OK
+        )
+        Title.objects.get(pk=first).delete()
+        for url in (
+            self.reviews_url(first),
+            f'{self.reviews_url(first)}{review.pk}/comments/',
+        ):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, url
+            assert not context.captured_queries, (
+                f'Проверьте, что `{url}` с удаленным id отклоняется без '
+                f'запросов к БД.'
+            )
+        url = f'{self.reviews_url(second)}{review.pk - 1}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что промах карты ниже загруженного максимума '
+            'подтверждается одним запросом exists().'
+        )
+
+    def test_02_created_ids_are_found(self, client, admin_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        title_ids.ensure_loaded()
+        review_ids.ensure_loaded()
+        created = admin_client.post(
+            self.reviews_url(titles[0]['id']), data={'text': 'т', 'score': 5}
+        ).json()
+        url = f'{self.reviews_url(titles[0]["id"])}{created["id"]}/comments/'
+        assert client.get(url).status_code == HTTPStatus.OK
+        # Объекты без сигналов выше загруженного максимума проверяются в БД.
+        category = Category.objects.create(name='Кино', slug='kino')
+        Title.objects.bulk_create([Title(
+            name='Новое', year=2000, description='-', category=category
+        )])
+        latest = Title.objects.latest('pk').pk
+        assert client.get(self.reviews_url(latest)).status_code == (
+            HTTPStatus.OK
+        )
+        assert client.get(self.reviews_url(latest + 1)).status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_03_rolled_back_delete(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_ids.ensure_loaded()
+        title_id = titles[0]['id']
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Title.objects.get(pk=title_id).delete()
+                raise RuntimeError
+        assert client.get(self.reviews_url(title_id)).status_code == (
+            HTTPStatus.OK
+        ), 'Проверьте, что id снимается с карты только после фиксации.'
+
+    def test_04_expired_map_reloads_after_response(self, admin_client,
+                                                   settings):
+        titles, _, _ = create_titles(admin_client)
+        title_ids.reset()
+        with CaptureQueriesContext(connection) as context:
+            title_ids.ensure_loaded()
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что карта id загружается одним потоковым запросом.'
+        )
+        Title.objects.filter(pk=titles[1]['id']).delete()
+        settings.API_ID_BITMAP_TTL = 0
+        loaded_at = title_ids.loaded_at
+        membership.begin_request()
+        try:
+            with CaptureQueriesContext(connection) as context:
+                assert title_ids.might_exist(titles[0]['id'])
+                assert not title_ids.might_exist(titles[1]['id'])
+            assert not context.captured_queries, (
+                'Проверьте, что истекшая карта не перезагружается во время '
+                'запроса.'
+            )
+        finally:
+            membership.finish_request()
+        assert title_ids.loaded_at > loaded_at, (
+            'Проверьте, что истекшая карта перезагружается после ответа.'
+        )
+
+    def test_05_explicit_ids_below_loaded_max(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first = titles[0]['id']
+        Title.objects.filter(pk=first).delete()
+        title_ids.reset()
+        title_ids.ensure_loaded()
+        # Другой процесс (import_csv) вставляет строку с явным id без
+        # сигналов этого процесса.
+        category = Category.objects.create(name='Кино', slug='kino')
+        Title.objects.bulk_create([Title(
+            id=first, name='Импорт', year=2000, description='-',
+            category=category
+        )])
+        assert first <= title_ids.loaded_max
+        assert client.get(self.reviews_url(first)).status_code == (
+            HTTPStatus.OK
+        ), (
+            'Проверьте, что промах карты ниже загруженного максимума '
+            'проверяется в БД, а не возвращает 404.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert title_ids.might_exist(first)
+        assert not context.captured_queries, (
+            'Проверьте, что найденный в БД id ставится в карту.'
+        )
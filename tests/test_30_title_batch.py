@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.membership import title_ids
+from tests.utils import create_titles
+
+URL = '/api/v1/titles/batch/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30TitleBatch:
+
+    def test_01_order_and_missing(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        missing = second + 100
+        title_ids.ensure_loaded()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(
+                URL, {'ids': f'{second},{missing},{first},{second}'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [
+            second, first
+        ], (
+            'Проверьте, что `/api/v1/titles/batch/` возвращает произведения '
+            'в порядке `ids` без повторов.'
+        )
+        assert data['missing'] == [missing]
+        assert data['results'][1]['genre'] and data['results'][1]['category']
+        assert len(context.captured_queries) == 2, (
+            'Проверьте, что произведения с категориями и жанрами загружаются '
+            'двумя запросами.'
+        )
+
+    def test_02_invalid_ids(self, client):
+        for ids in ('', '1,a', '1,,2', '-1', '0', '1,99999999999999999999999',
+                    '1,²'):
+            response = client.get(URL, {'ids': ids})
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `ids={ids}` отклоняется с ответом 400.'
+            )
+            assert 'ids' in response.json()
+
+    @override_settings(API_TITLE_BATCH_SIZE=3)
+    def test_03_batch_size(self, client):
+        response = client.get(URL, {'ids': '1,2,3,4'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что запрос больше API_TITLE_BATCH_SIZE id '
+            'отклоняется.'
+        )
+        response = client.get(URL, {'ids': '1,2,3,3'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'results': [], 'missing': [1, 2, 3]}
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, User
+from tests.utils import create_titles
+
+
+def create_reviews(title_id, count):
+    reviews = []
+    for index in range(count):
+        author = User.objects.create(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        reviews.append(Review.objects.create(
+            title_id=title_id, author=author, text=f'отзыв {index}',
+            score=index % 10 + 1,
+        ))
+    return reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31TitleExpand:
+
+    def test_01_embedded_reviews(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reviews = create_reviews(title_id, 6)
+        for review in reviews[:2]:
+            Comment.objects.create(review=review, author=review.author,
+                                   text='к')
+        Comment.objects.create(review=reviews[0], author=reviews[1].author,
+                               text='к')
+        url = f'/api/v1/titles/{title_id}/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'expand': 'reviews,comment_counts'})
+        assert response.status_code == HTTPStatus.OK
+        assert len(context.captured_queries) <= 4, (
+            'Проверьте, что произведение со встроенными отзывами и числом '
+            'комментариев отдается ограниченным числом запросов.'
+        )
+        data = response.json()
+        assert data['id'] == title_id and data['genre']
+        embedded = data['reviews']
+        page = client.get(f'{url}reviews/').json()
+        assert embedded['count'] == page['count'] == 6
+        assert [review['id'] for review in embedded['results']] == [
+            review['id'] for review in page['results']
+        ], (
+            'Проверьте, что встроена первая страница списка отзывов '
+            'произведения.'
+        )
+        assert embedded['next'].endswith(
+            f'/api/v1/titles/{title_id}/reviews/?page=2'
+        )
+        assert [
+            review['comment_count'] for review in embedded['results']
+        ] == [2, 1, 0, 0, 0]
+        assert embedded['results'][0]['title'] == title_id
+        assert 'reviews' not in client.get(url).json()
+        response = client.get(url, {'expand': 'reviews'})
+        assert 'comment_count' not in response.json()['reviews']['results'][0]
+
+    def test_02_comment_writes_refresh_response(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review, = create_reviews(title_id, 1)
+        url = f'/api/v1/titles/{title_id}/?expand=reviews,comment_counts'
+        response = client.get(url)
+        etag = response['ETag']
+        assert response.json()['reviews']['results'][0]['comment_count'] == 0
+        comment = Comment.objects.create(review=review, author=review.author,
+                                         text='к')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag развернутого '
+            'произведения.'
+        )
+        assert response.json()['reviews']['results'][0]['comment_count'] == 1
+        etag = response['ETag']
+        comment.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['reviews']['results'][0]['comment_count'] == 0
+        review.text = 'новый текст'
+        review.save()
+        response = client.get(url)
+        assert response.json()['reviews']['results'][0]['text'] == (
+            'новый текст'
+        ), 'Проверьте, что изменение отзыва сбрасывает кэш ответа.'
+
+    def test_03_invalid_expand(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        for expand in ('genres', 'comment_counts'):
+            response = client.get(url, {'expand': expand})
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `expand={expand}` отклоняется с ответом 400.'
+            )
+            assert 'expand' in response.json()
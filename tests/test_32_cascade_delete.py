@@ -0,0 +1,133 @@
+import pytest
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import (
+    ChangeEvent,
+    Comment,
+    LeaderboardEntry,
+    Review,
+    Title,
+    User,
+)
+
+
+def create_users(count):
+    return [
+        User.objects.create(
+            username=f'author{index}', email=f'author{index}@yamdb.fake'
+        )
+        for index in range(count)
+    ]
+
+
+def statements(context, prefix, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(prefix) and f'"{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32CascadeDelete:
+
+    def test_01_title_cascade(self):
+        title = Title.objects.create(name='Улисс', year=1922, description='')
+        users = create_users(30)
+        for user in users:
+            review = Review.objects.create(
+                title=title, author=user, text='т', score=7
+            )
+            Comment.objects.create(review=review, author=user, text='к')
+        assert LeaderboardEntry.objects.filter(title=title).exists()
+        ChangeEvent.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        assert not statements(context, 'UPDATE', 'reviews_title'), (
+            'Проверьте, что рейтинг и updated_at удаляемого произведения '
+            'не обновляются для каждого отзыва и комментария.'
+        )
+        assert len(statements(context, 'INSERT', 'reviews_changeevent')) <= 2
+        assert len(context.captured_queries) < 30, (
+            'Проверьте, что число запросов при удалении произведения не '
+            'растет с числом отзывов и комментариев.'
+        )
+        events = ChangeEvent.objects.values_list('model', 'action')
+        assert sorted(events) == sorted(
+            [('comment', 'delete')] * 30 + [('review', 'delete')] * 30
+            + [('title', 'delete')]
+        )
+        assert not LeaderboardEntry.objects.exists()
+
+    def test_02_user_cascade(self):
+        titles = [
+            Title.objects.create(name=f'Книга {index}', year=2000,
+                                 description='')
+            for index in range(3)
+        ]
+        author, other = create_users(2)
+        expected_paths = set()
+        for title in titles:
+            Review.objects.create(title=title, author=author, text='т',
+                                  score=10)
+            review = Review.objects.create(title=title, author=other,
+                                           text='т', score=2)
+            comment = Comment.objects.create(review=review, author=author,
+                                             text='к')
+            expected_paths.add(
+                f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+                f'comments/{comment.pk}/'
+            )
+        before = dict(Title.objects.values_list('pk', 'updated_at'))
+        ChangeEvent.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as context:
+            author.delete()
+        assert len(statements(context, 'INSERT', 'reviews_changeevent')) == 1
+        assert len(statements(context, 'UPDATE', 'reviews_title')) <= 2, (
+            'Проверьте, что оценки удаляемого пользователя убираются из '
+            'рейтинга пакетом, а не по запросу на каждый отзыв.'
+        )
+        for title in Title.objects.all():
+            assert (title.review_count, title.rating) == (1, 2), (
+                'Проверьте, что удаление пользователя убирает его оценки из '
+                'рейтинга произведений.'
+            )
+            assert title.updated_at > before[title.pk]
+        assert set(ChangeEvent.objects.filter(
+            model='comment'
+        ).values_list('path', flat=True)) == expected_paths, (
+            'Проверьте адреса удаленных комментариев в журнале изменений.'
+        )
+        assert ChangeEvent.objects.filter(
+            model='title', action='update'
+        ).count() == 3
+
+    def test_03_rolled_back_delete(self):
+        title = Title.objects.create(name='Книга', year=2000, description='')
+        first, second = create_users(2)
+        review = Review.objects.create(title=title, author=first, text='т',
+                                       score=4)
+        Review.objects.create(title=title, author=second, text='т', score=8)
+
+        def fail(**kwargs):
+            raise RuntimeError
+
+        post_delete.connect(fail, sender=Comment)
+        Comment.objects.create(review=review, author=first, text='к')
+        try:
+            with transaction.atomic():
+                with pytest.raises(RuntimeError):
+                    with transaction.atomic():
+                        Title.objects.get(pk=title.pk).delete()
+                post_delete.disconnect(fail, sender=Comment)
+                Review.objects.get(pk=review.pk).delete()
+        finally:
+            post_delete.disconnect(fail, sender=Comment)
+        title.refresh_from_db()
+        assert (title.review_count, title.rating) == (1, 8), (
+            'Проверьте, что отметка откаченного удаления не отключает '
+            'пересчет рейтинга.'
+        )